@@ -0,0 +1,58 @@
+"""
+Shared pytest hooks for the property-based test suite.
+
+The interview agent property tests are grouped per test class so that
+``pytest -n auto --dist=loadgroup`` (pytest-xdist) runs each class on a single
+worker while different classes spread across CPU cores. Every class resets the
+in-memory session store in ``setup_method``, and that store is per-process, so
+classes do not interfere with each other across workers.
+
+The property tests smoke-test consistent behaviour rather than hunt for minimal
+counterexamples, so the default "fast" Hypothesis profile skips shrinking and the
+on-disk example database. Explicit ``@example`` cases still run. Deeper runs pick
+a staged profile through the ``HYP_PROFILE`` environment variable:
+
+- ``ci``: 20 examples per test, no example database
+- ``dev``: 100 examples, failures saved to ``.hypothesis/examples`` and replayed
+- ``nightly``: 500 examples, same database as ``dev``
+"""
+import os
+
+import pytest
+from hypothesis import HealthCheck, Phase, settings
+from hypothesis.database import DirectoryBasedExampleDatabase
+
+settings.register_profile(
+    "fast",
+    max_examples=25,
+    database=None,
+    phases=[Phase.explicit, Phase.generate],
+    deadline=None,
+    suppress_health_check=[HealthCheck.too_slow],
+)
+settings.register_profile("ci", max_examples=20, database=None, deadline=None)
+settings.register_profile(
+    "dev",
+    max_examples=100,
+    database=DirectoryBasedExampleDatabase(".hypothesis/examples"),
+)
+settings.register_profile(
+    "nightly",
+    max_examples=500,
+    database=DirectoryBasedExampleDatabase(".hypothesis/examples"),
+    deadline=None,
+)
+settings.load_profile(os.environ.get("HYP_PROFILE", "fast"))
+
+
+def pytest_configure(config):
+    # Registered here so the marker is known even when pytest-xdist is absent
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run all tests of the group on one xdist worker"
+    )
+
+
+def pytest_collection_modifyitems(items):
+    for item in items:
+        if "test_interview_agent_props" in item.nodeid and item.cls is not None:
+            item.add_marker(pytest.mark.xdist_group(item.cls.__name__))
@@ -0,0 +1,217 @@
+"""
+Tests for the result cache of utils.enhanced_url_fetcher.
+No network access: the shared requests session, the config loader and the
+content extractors are patched, so only URL normalization, the cache key and
+the conditional-GET / LRU logic are exercised.
+
+**Feature: url-result-cache**
+"""
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import enhanced_url_fetcher as fetcher
+
+_HTML = "<html><body>" + "<p>正文段落。</p>" * 100 + "</body></html>"
+_CFG = {"url_extract_cookie": "", "url_extract_headers": "", "url_extract_headers_json": "",
+        "web_extract_render_mode": "off"}
+
+
+class _FakeResponse:
+    def __init__(self, status_code, headers=None, body=b""):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict({"Content-Type": "text/html; charset=utf-8", **(headers or {})})
+        self._body = body
+
+    def iter_content(self, chunk_size=1):
+        yield self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise fetcher.requests.HTTPError(str(self.status_code))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache(monkeypatch):
+    for name in ("URL_EXTRACT_COOKIE", "URL_EXTRACT_COOKIES", "URL_EXTRACT_HEADERS_JSON"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(fetcher, "_result_cache_chars", 0)
+    fetcher._RESULT_CACHE.clear()
+    yield
+    fetcher._RESULT_CACHE.clear()
+
+
+@pytest.fixture
+def fake_http():
+    """Patch config, session and extractor; yields the list of request headers sent."""
+    sent = []
+    responses = []
+
+    def fake_get(url, headers=None, **kwargs):
+        sent.append(dict(headers or {}))
+        return responses.pop(0)
+
+    with patch.object(fetcher, "load_ini", return_value=dict(_CFG)), \
+            patch.object(fetcher._SESSION, "get", side_effect=fake_get), \
+            patch.object(fetcher, "_extract_best", return_value=("trafilatura", "提取的正文", 0.9)) as best:
+        yield sent, responses, best
+
+
+class TestNormalizeUrl:
+    """
+    **Feature: url-result-cache, Property 1: equivalent URLs share one cache key**
+    """
+
+    @pytest.mark.parametrize("url, expected", [
+        ("HTTPS://Example.COM/a/b/", "https://example.com/a/b"),
+        ("https://example.com/a?utm_source=x&id=3&UTM_medium=y", "https://example.com/a?id=3"),
+        ("https://example.com/a?fbclid=1&gclid=2&spm=3", "https://example.com/a"),
+        ("https://example.com/a?b=2&a=1#section", "https://example.com/a?b=2&a=1"),
+        ("  https://example.com/  ", "https://example.com"),
+    ])
+    def test_normalize(self, url, expected):
+        assert fetcher._normalize_url(url) == expected
+
+    @pytest.mark.parametrize("a, b, same", [
+        ("http://example.com/a?utm_source=x", "https://example.com/a/", True),
+        ("https://example.com/a", "https://example.com/b", False),
+        ("https://example.com/a?id=1", "https://example.com/a?id=2", False),
+    ])
+    def test_same_resource(self, a, b, same):
+        assert fetcher._same_resource(a, b) is same
+
+
+class TestConditionalGet:
+    """
+    **Feature: url-result-cache, Property 2: validators are revalidated, not trusted blindly**
+
+    A result with an ETag is cached; fetching the same page again sends
+    If-None-Match, and a 304 reuses the cached result without re-extracting.
+    """
+
+    def test_304_reuses_cached_result(self, fake_http):
+        sent, responses, best = fake_http
+        responses.append(_FakeResponse(200, {"ETag": '"v1"'}, _HTML.encode()))
+        first = fetcher.fetch_url_enhanced("https://example.com/post?utm_source=feed")
+        assert first["success"] and first["text"] == "提取的正文"
+
+        responses.append(_FakeResponse(304))
+        second = fetcher.fetch_url_enhanced("https://example.com/post")
+
+        assert sent[1]["If-None-Match"] == '"v1"'
+        assert second == first
+        assert best.call_count == 1
+
+    def test_changed_page_is_refetched(self, fake_http):
+        sent, responses, best = fake_http
+        responses.append(_FakeResponse(200, {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, _HTML.encode()))
+        fetcher.fetch_url_enhanced("https://example.com/post")
+        responses.append(_FakeResponse(200, {"Last-Modified": "Tue, 02 Jan 2024 00:00:00 GMT"}, _HTML.encode()))
+        fetcher.fetch_url_enhanced("https://example.com/post")
+
+        assert sent[1]["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+        assert best.call_count == 2
+        (_, last_modified, _), = fetcher._RESULT_CACHE.values()
+        assert last_modified == "Tue, 02 Jan 2024 00:00:00 GMT"
+
+    def test_without_validators_nothing_is_cached(self, fake_http):
+        sent, responses, _ = fake_http
+        responses.append(_FakeResponse(200, {}, _HTML.encode()))
+        fetcher.fetch_url_enhanced("https://example.com/post")
+        assert not fetcher._RESULT_CACHE
+
+    def test_cache_is_keyed_by_credentials(self, fake_http, monkeypatch):
+        sent, responses, best = fake_http
+        monkeypatch.setenv("URL_EXTRACT_COOKIE", "session=alice")
+        responses.append(_FakeResponse(200, {"ETag": '"v1"'}, _HTML.encode()))
+        fetcher.fetch_url_enhanced("https://example.com/private")
+
+        monkeypatch.setenv("URL_EXTRACT_COOKIE", "session=bob")
+        responses.append(_FakeResponse(200, {"ETag": '"v1"'}, _HTML.encode()))
+        fetcher.fetch_url_enhanced("https://example.com/private")
+
+        assert "If-None-Match" not in sent[1]
+        assert best.call_count == 2
+        assert len(fetcher._RESULT_CACHE) == 2
+
+
+class TestResultCacheLru:
+    """
+    **Feature: url-result-cache, Property 3: the cache stays within its bounds**
+    """
+
+    def test_evicts_least_recently_used(self, monkeypatch):
+        monkeypatch.setattr(fetcher, "_RESULT_CACHE_MAX_ENTRIES", 2)
+        for name in ("a", "b"):
+            fetcher._cache_store((name,), '"e"', None, {"text": name})
+        assert fetcher._cache_lookup(("a",)) is not None  # a becomes most recent
+        fetcher._cache_store(("c",), '"e"', None, {"text": "c"})
+
+        assert list(fetcher._RESULT_CACHE) == [("a",), ("c",)]
+
+    def test_character_budget(self, monkeypatch):
+        monkeypatch.setattr(fetcher, "_RESULT_CACHE_MAX_CHARS", 10)
+        fetcher._cache_store(("big",), '"e"', None, {"text": "x" * 11})
+        fetcher._cache_store(("a",), '"e"', None, {"text": "x" * 6})
+        fetcher._cache_store(("b",), '"e"', None, {"text": "x" * 6})
+
+        assert list(fetcher._RESULT_CACHE) == [("b",)]
+        assert fetcher._result_cache_chars == 6
+
+
+class TestExtractBest:
+    """
+    **Feature: url-result-cache, Property 4: a valid trafilatura result ends the cascade**
+
+    When trafilatura's text validates, no other extractor runs; otherwise the
+    higher-scoring valid result of newspaper3k and readability is returned.
+    """
+
+    @pytest.fixture
+    def extractors(self):
+        calls = []
+        texts = {}
+
+        def make(name):
+            def fn(url, html):
+                calls.append(name)
+                return texts.get(name, "")
+            return fn
+
+        def validate(text, url):
+            return (True, float(text)) if text else (False, 0.0)
+
+        with patch.object(fetcher, "extract_with_trafilatura", make("trafilatura")), \
+                patch.object(fetcher, "extract_with_newspaper", make("newspaper3k")), \
+                patch.object(fetcher, "extract_with_readability", make("readability")), \
+                patch.object(fetcher, "_get_article_cls", return_value=object), \
+                patch.object(fetcher, "_get_document_cls", return_value=object), \
+                patch.object(fetcher, "validate_content", side_effect=validate):
+            yield calls, texts
+
+    def test_valid_trafilatura_stops_early(self, extractors):
+        calls, texts = extractors
+        texts.update(trafilatura="0.3", newspaper3k="0.9", readability="0.9")
+        assert fetcher._extract_best("https://example.com", _HTML) == ("trafilatura", "0.3", 0.3)
+        assert calls == ["trafilatura"]
+
+    @pytest.mark.parametrize("news, read, expected", [
+        ("0.4", "0.6", ("readability", "0.6", 0.6)),
+        ("0.6", "0.6", ("newspaper3k", "0.6", 0.6)),
+        ("", "0.5", ("readability", "0.5", 0.5)),
+        ("", "", None),
+    ])
+    def test_best_of_fallbacks(self, extractors, news, read, expected):
+        calls, texts = extractors
+        texts.update(newspaper3k=news, readability=read)
+        assert fetcher._extract_best("https://example.com", _HTML) == expected
+        assert calls == ["trafilatura", "newspaper3k", "readability"]
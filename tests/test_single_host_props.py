@@ -1,11 +1,14 @@
 """
 Property-based tests for single-host podcast feature.
-Uses Hypothesis library for property testing.
+The input domains are small, so every combination is enumerated with
+pytest.mark.parametrize instead of being sampled by Hypothesis.
 
 **Feature: single-host-podcast**
 """
+import contextlib
+import itertools
+import types
 import pytest
-from hypothesis import given, strategies as st, settings, assume
 from unittest.mock import patch, MagicMock
 import sys
 import os
@@ -13,6 +16,105 @@ import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from fastapi.testclient import TestClient
+from pydub import AudioSegment
+from clients.hunyuan_api_client import HunyuanAPIClient
+from clients.prompt_adjuster import PromptAdjuster
+from pipeline.podcast_pipeline_new import build_outline_and_script, tts_and_mix
+from api_main import app as _api_app
+
+# Read-only configs shared by every case
+_HUNYUAN_CFG = types.MappingProxyType({
+    "hunyuan_api_secret_id": "test",
+    "hunyuan_api_secret_key": "test",
+    "hunyuan_api_region": "ap-guangzhou",
+    "hunyuan_api_model": "hunyuan-turbos-latest",
+    "hunyuan_api_temperature": 0.8,
+    "hunyuan_api_top_p": 0.8,
+    "hunyuan_api_max_tokens": 10000,
+})
+_TTS_CFG = types.MappingProxyType({
+    "output_dir": "/tmp/test_output",
+    "tencent_secret_id": "test",
+    "tencent_secret_key": "test",
+    "tencent_region": "ap-guangzhou",
+    "voice_role_a": "501006",
+    "voice_role_b": "601007",
+    "assets_bgm_dir": "/tmp/assets/bgm",
+    "bgm_history": "history.mp3",
+    "bgm_entertainment": "entertainment.mp3",
+    "bgm_serious": "serious.mp3",
+})
+
+# Keywords identifying the monologue / dialogue prompt templates
+_SINGLE_KW_CN = ("单人", "独白", "单人主播")
+_DUAL_KW_CN = ("两人", "主播A", "主播B", "对话")
+_SINGLE_KW_EN = ("single-host", "monologue", "Single Host")
+_DUAL_KW_EN = ("two-person", "Host A", "Host B", "dialogue")
+
+# One pre-built multi-chunk script per chunk count used by the TTS tests
+_SCRIPT_CACHE = {
+    n: "\n".join(f"这是第{i+1}段测试内容。" for i in range(n))
+    for n in range(2, 11)
+}
+
+# API form payloads per (mode, style), each carrying that mode's input field
+_STYLES = ('news', 'chat', 'interview', 'story')
+_MODE_INPUTS = {
+    "Query": ("query", "测试主题"),
+    "URL": ("url", "http://test.com"),
+    "文档": ("doc", "测试文档内容"),
+}
+_FORM_TEMPLATES = {
+    (mode, style): {
+        "mode": mode,
+        "style": style,
+        "voice_a": "501006:千嶂",
+        "voice_b": "601007:爱小叶",
+        field: value,
+    }
+    for mode, (field, value) in _MODE_INPUTS.items()
+    for style in _STYLES
+}
+
+# Canned run_end_to_end result; host_mode is filled in per call
+_FAKE_RESULT = {
+    "audio_path": "/tmp/test.mp3",
+    "transcript_path": "/tmp/test.txt",
+    "sources": [],
+    "script": "Test script",
+}
+
+# Stand-in for pydub.AudioSegment.from_file; append() chains back to itself
+_SHARED_SEGMENT = MagicMock(spec=AudioSegment, name="AudioSegment")
+_SHARED_SEGMENT.append.return_value = _SHARED_SEGMENT
+
+
+@pytest.fixture(scope="class")
+def captured_prompts():
+    """Patch the LLM client and prompt adjuster once per class; yields the prompts sent to the LLM."""
+    captured_prompts = []
+    
+    def mock_chat(messages, stream=False):
+        # Capture the user message (prompt); it is always the last one sent
+        if messages and messages[-1].get("Role") == "user":
+            captured_prompts.append(messages[-1].get("Content", ""))
+        return {
+            "Choices": [{"Message": {"Content": "测试脚本内容"}}]
+        }
+    
+    mock_client = MagicMock(spec=HunyuanAPIClient)
+    mock_client.chat = mock_chat
+    
+    mock_adjuster = MagicMock(spec=PromptAdjuster)
+    mock_adjuster.analyze_content.return_value = {"duration": "medium"}
+    mock_adjuster.adjust_prompt.side_effect = lambda p, a: p  # Return prompt unchanged
+    
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr('pipeline.podcast_pipeline_new.HunyuanAPIClient', lambda *a, **kw: mock_client)
+        mp.setattr('pipeline.podcast_pipeline_new.PromptAdjuster', lambda *a, **kw: mock_adjuster)
+        yield captured_prompts
+
 
 class TestPromptTemplateSelection:
     """
@@ -24,40 +126,16 @@ class TestPromptTemplateSelection:
     "独白"、"讲解") rather than the dialogue-style template (containing "主播A"、"主播B").
     """
     
-    @settings(max_examples=100)
-    @given(
-        host_mode=st.sampled_from(['single', 'dual']),
-        style=st.sampled_from(['news', 'chat', 'interview', 'story']),
-        is_english=st.booleans()
-    )
-    def test_prompt_template_matches_host_mode(self, host_mode, style, is_english):
+    @pytest.mark.parametrize("host_mode,style,is_english", list(itertools.product(
+        ['single', 'dual'], ['news', 'chat', 'interview', 'story'], [False, True]
+    )))
+    def test_prompt_template_matches_host_mode(self, host_mode, style, is_english, captured_prompts):
         """
         Property: The prompt template used must match the host_mode parameter.
         - single mode: should contain monologue keywords, NOT dialogue keywords
         - dual mode: should contain dialogue keywords, NOT monologue-only keywords
         """
-        # Mock the LLM API to capture the prompt
-        captured_prompts = []
-        
-        def mock_chat(messages, stream=False):
-            # Capture the user message (prompt)
-            for msg in messages:
-                if msg.get("Role") == "user":
-                    captured_prompts.append(msg.get("Content", ""))
-            return {
-                "Choices": [{"Message": {"Content": "测试脚本内容"}}]
-            }
-        
-        # Mock config
-        mock_cfg = {
-            "hunyuan_api_secret_id": "test",
-            "hunyuan_api_secret_key": "test",
-            "hunyuan_api_region": "ap-guangzhou",
-            "hunyuan_api_model": "hunyuan-turbos-latest",
-            "hunyuan_api_temperature": 0.8,
-            "hunyuan_api_top_p": 0.8,
-            "hunyuan_api_max_tokens": 10000,
-        }
+        captured_prompts.clear()
         
         # Mock sources
         mock_sources = [
@@ -67,42 +145,25 @@ class TestPromptTemplateSelection:
         # Mock instruction_analysis for English mode
         instruction_analysis = {"is_english": is_english} if is_english else None
         
-        with patch('pipeline.podcast_pipeline_new.HunyuanAPIClient') as MockClient:
-            mock_instance = MagicMock()
-            mock_instance.chat = mock_chat
-            MockClient.return_value = mock_instance
-            
-            with patch('pipeline.podcast_pipeline_new.PromptAdjuster') as MockAdjuster:
-                mock_adjuster = MagicMock()
-                mock_adjuster.analyze_content.return_value = {"duration": "medium"}
-                mock_adjuster.adjust_prompt.side_effect = lambda p, a: p  # Return prompt unchanged
-                MockAdjuster.return_value = mock_adjuster
-                
-                from pipeline.podcast_pipeline_new import build_outline_and_script
-                
-                result = build_outline_and_script(
-                    cfg=mock_cfg,
-                    topic="测试话题",
-                    sources=mock_sources,
-                    style=style,
-                    instruction=None,
-                    mode="query",
-                    original_input="测试输入",
-                    instruction_analysis=instruction_analysis,
-                    host_mode=host_mode
-                )
+        result = build_outline_and_script(
+            cfg=_HUNYUAN_CFG,
+            topic="测试话题",
+            sources=mock_sources,
+            style=style,
+            instruction=None,
+            mode="query",
+            original_input="测试输入",
+            instruction_analysis=instruction_analysis,
+            host_mode=host_mode
+        )
         
         # Verify prompt was captured
         assert len(captured_prompts) > 0, "No prompt was captured"
         prompt = captured_prompts[0]
         
-        # Define keywords for each mode
-        if is_english:
-            single_keywords = ["single-host", "monologue", "Single Host"]
-            dual_keywords = ["two-person", "Host A", "Host B", "dialogue"]
-        else:
-            single_keywords = ["单人", "独白", "单人主播"]
-            dual_keywords = ["两人", "主播A", "主播B", "对话"]
+        # Pick the keyword set for the prompt language
+        single_keywords = _SINGLE_KW_EN if is_english else _SINGLE_KW_CN
+        dual_keywords = _DUAL_KW_EN if is_english else _DUAL_KW_CN
         
         if host_mode == "single":
             # Single mode should have monologue keywords
@@ -127,63 +188,51 @@ class TestTTSVoiceConsistency:
     calls shall use the same voice parameter (voice_a), and no calls shall use voice_b.
     """
     
-    @settings(max_examples=50)
-    @given(
-        host_mode=st.sampled_from(['single', 'dual']),
-        num_chunks=st.integers(min_value=2, max_value=10)
-    )
+    @pytest.fixture(autouse=True)
+    def _patches(self):
+        """Enter the TTS/audio/file patches once per test rather than per call site."""
+        self.voices_used = []
+        _SHARED_SEGMENT.reset_mock()
+
+        def mock_synthesize(text, secret_id, secret_key, region, voice, speed, codec):
+            self.voices_used.append(voice)
+            return {"success": True, "bytes": b"fake_audio_data"}
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(patch('pipeline.podcast_pipeline_new.synthesize_tencent_tts', side_effect=mock_synthesize))
+            stack.enter_context(patch('pipeline.podcast_pipeline_new.ensure_dir'))
+            stack.enter_context(patch('pipeline.podcast_pipeline_new.export_with_intro'))
+            stack.enter_context(patch('pipeline.podcast_pipeline_new.export_with_dynamic_intro'))
+            stack.enter_context(patch('pydub.AudioSegment.from_file', return_value=_SHARED_SEGMENT))
+            stack.enter_context(patch('pydub.AudioSegment.silent', return_value=_SHARED_SEGMENT))
+            stack.enter_context(patch('builtins.open', MagicMock()))
+            yield
+
+    @pytest.mark.parametrize("host_mode,num_chunks", list(itertools.product(
+        ['single', 'dual'], range(2, 11)
+    )))
     def test_tts_voice_consistency(self, host_mode, num_chunks):
         """
         Property: In single mode, all TTS calls use the same voice (voice_a).
         In dual mode, TTS calls alternate between voice_a and voice_b.
         """
         # Track which voices are used
-        voices_used = []
-        
-        def mock_synthesize(text, secret_id, secret_key, region, voice, speed, codec):
-            voices_used.append(voice)
-            return {"success": True, "bytes": b"fake_audio_data"}
-        
-        # Create a script with multiple chunks
-        script = "\n".join([f"这是第{i+1}段测试内容。" for i in range(num_chunks)])
+        voices_used = self.voices_used
+        voices_used.clear()
         
-        mock_cfg = {
-            "output_dir": "/tmp/test_output",
-            "tencent_secret_id": "test",
-            "tencent_secret_key": "test",
-            "tencent_region": "ap-guangzhou",
-            "voice_role_a": "501006",
-            "voice_role_b": "601007",
-            "assets_bgm_dir": "/tmp/assets/bgm",
-            "bgm_history": "history.mp3",
-            "bgm_entertainment": "entertainment.mp3",
-            "bgm_serious": "serious.mp3",
-        }
+        # Script with multiple chunks, one line each
+        script = _SCRIPT_CACHE[num_chunks]
         
-        with patch('pipeline.podcast_pipeline_new.synthesize_tencent_tts', side_effect=mock_synthesize):
-            with patch('pipeline.podcast_pipeline_new.ensure_dir'):
-                with patch('pipeline.podcast_pipeline_new.export_with_intro'):
-                    with patch('pydub.AudioSegment.from_file') as mock_audio:
-                        mock_segment = MagicMock()
-                        mock_segment.append.return_value = mock_segment
-                        mock_audio.return_value = mock_segment
-                        
-                        with patch('builtins.open', MagicMock()):
-                            from pipeline.podcast_pipeline_new import tts_and_mix
-                            
-                            try:
-                                tts_and_mix(
-                                    cfg=mock_cfg,
-                                    script=script,
-                                    intro_style="tongyong",
-                                    speed=0,
-                                    voice_a="501006:千嶂",
-                                    voice_b="601007:爱小叶",
-                                    host_mode=host_mode
-                                )
-                            except Exception:
-                                # May fail due to file operations, but we captured the voices
-                                pass
+        # Audio, export and file I/O are all stubbed, so the call runs to completion
+        tts_and_mix(
+            cfg=_TTS_CFG,
+            script=script,
+            intro_style="tongyong",
+            speed=0,
+            voice_a="501006:千嶂",
+            voice_b="601007:爱小叶",
+            host_mode=host_mode
+        )
         
         if len(voices_used) > 0:
             if host_mode == "single":
@@ -202,137 +251,60 @@ if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
 
-class TestAPIDefaultMode:
+@pytest.fixture(scope="module")
+def api_client():
+    """One TestClient for every API test in this module, with COS uploads disabled."""
+    with patch('api_main.cos_client', None):
+        yield TestClient(_api_app)
+
+
+class TestAPIHostMode:
     """
     **Feature: single-host-podcast, Property 3: API defaults to dual mode**
-    **Validates: Requirements 6.2**
+    **Feature: single-host-podcast, Property 4: API response includes host_mode**
+    **Validates: Requirements 6.2, 6.4**
     
     For any API request that does not include the host_mode parameter, 
-    the system shall process it as host_mode="dual" and return host_mode: "dual" in the response.
+    the system shall process it as host_mode="dual". For any successful podcast 
+    generation response, the response object shall contain a host_mode field 
+    matching the requested (or defaulted) mode.
     """
     
-    @settings(max_examples=20)
-    @given(
-        mode=st.sampled_from(['Query', 'URL', '文档']),
-        style=st.sampled_from(['news', 'chat', 'interview', 'story'])
-    )
-    def test_api_defaults_to_dual_mode(self, mode, style):
+    @pytest.mark.parametrize("mode", ['Query', 'URL', '文档'])
+    @pytest.mark.parametrize("requested_host_mode,expected_host_mode", [
+        (None, "dual"),
+        ("single", "single"),
+        ("dual", "dual"),
+    ])
+    def test_api_host_mode(self, api_client, monkeypatch, requested_host_mode, expected_host_mode, mode):
         """
-        Property: When host_mode is not provided, API should default to "dual".
+        Property: host_mode defaults to "dual" and is echoed back in the response.
         """
-        from fastapi.testclient import TestClient
-        
         # Mock the run_end_to_end function to capture parameters
         captured_host_mode = []
         
         def mock_run_end_to_end(*args, **kwargs):
             captured_host_mode.append(kwargs.get('host_mode', 'not_provided'))
-            return {
-                "audio_path": "/tmp/test.mp3",
-                "transcript_path": "/tmp/test.txt",
-                "sources": [],
-                "script": "Test script",
-                "host_mode": kwargs.get('host_mode', 'dual')
-            }
+            return {**_FAKE_RESULT, "host_mode": kwargs.get('host_mode', 'dual')}
         
-        with patch('api_main.run_end_to_end', side_effect=mock_run_end_to_end):
-            with patch('api_main.cos_client', None):
-                # Import after patching
-                from api_main import app
-                client = TestClient(app)
-                
-                # Make request WITHOUT host_mode parameter
-                form_data = {
-                    "mode": mode,
-                    "style": style,
-                    "voice_a": "501006:千嶂",
-                    "voice_b": "601007:爱小叶"
-                }
-                
-                if mode == "Query":
-                    form_data["query"] = "测试主题"
-                elif mode == "URL":
-                    form_data["url"] = "http://test.com"
-                else:
-                    form_data["doc"] = "测试文档内容"
-                
-                try:
-                    response = client.post("/api/generate", data=form_data)
-                    
-                    # Check that host_mode defaults to "dual"
-                    if len(captured_host_mode) > 0:
-                        assert captured_host_mode[-1] == "dual", f"Expected host_mode to default to 'dual', got '{captured_host_mode[-1]}'"
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        assert result.get("host_mode") == "dual", f"Response should have host_mode='dual', got '{result.get('host_mode')}'"
-                except Exception:
-                    # Test may fail due to missing dependencies, but we verified the default
-                    pass
-
-
-class TestAPIResponseIncludesHostMode:
-    """
-    **Feature: single-host-podcast, Property 4: API response includes host_mode**
-    **Validates: Requirements 6.4**
-    
-    For any successful podcast generation response, the response object 
-    shall contain a host_mode field with value either "single" or "dual".
-    """
-    
-    @settings(max_examples=20)
-    @given(
-        host_mode=st.sampled_from(['single', 'dual']),
-        mode=st.sampled_from(['Query', 'URL', '文档'])
-    )
-    def test_api_response_includes_host_mode(self, host_mode, mode):
-        """
-        Property: API response must include host_mode field.
-        """
-        from fastapi.testclient import TestClient
+        monkeypatch.setattr('api_main.run_end_to_end', mock_run_end_to_end)
         
-        def mock_run_end_to_end(*args, **kwargs):
-            return {
-                "audio_path": "/tmp/test.mp3",
-                "transcript_path": "/tmp/test.txt",
-                "sources": [],
-                "script": "Test script",
-                "host_mode": kwargs.get('host_mode', 'dual')
-            }
+        form_data = _FORM_TEMPLATES[(mode, "news")]
+        if requested_host_mode is not None:
+            form_data = {**form_data, "host_mode": requested_host_mode}
+            if requested_host_mode == "single":
+                del form_data["voice_b"]
+        
+        response = api_client.post("/api/generate", data=form_data)
+        assert response.status_code == 200, response.text
+        
+        # The pipeline must run in the requested (or default) mode
+        assert captured_host_mode == [expected_host_mode], \
+            f"Expected pipeline host_mode '{expected_host_mode}', got {captured_host_mode}"
         
-        with patch('api_main.run_end_to_end', side_effect=mock_run_end_to_end):
-            with patch('api_main.cos_client', None):
-                from api_main import app
-                client = TestClient(app)
-                
-                form_data = {
-                    "mode": mode,
-                    "host_mode": host_mode,
-                    "style": "news",
-                    "voice_a": "501006:千嶂"
-                }
-                
-                if host_mode == "dual":
-                    form_data["voice_b"] = "601007:爱小叶"
-                
-                if mode == "Query":
-                    form_data["query"] = "测试主题"
-                elif mode == "URL":
-                    form_data["url"] = "http://test.com"
-                else:
-                    form_data["doc"] = "测试文档内容"
-                
-                try:
-                    response = client.post("/api/generate", data=form_data)
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        # Verify host_mode is in response
-                        assert "host_mode" in result, "Response must include 'host_mode' field"
-                        # Verify host_mode value is valid
-                        assert result["host_mode"] in ["single", "dual"], f"host_mode must be 'single' or 'dual', got '{result['host_mode']}'"
-                        # Verify host_mode matches request
-                        assert result["host_mode"] == host_mode, f"Response host_mode should match request, expected '{host_mode}', got '{result['host_mode']}'"
-                except Exception:
-                    # Test may fail due to missing dependencies
-                    pass
+        result = response.json()
+        # Verify host_mode is in response
+        assert "host_mode" in result, "Response must include 'host_mode' field"
+        # Verify host_mode matches request
+        assert result["host_mode"] == expected_host_mode, \
+            f"Response host_mode should be '{expected_host_mode}', got '{result['host_mode']}'"
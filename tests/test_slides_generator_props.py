@@ -5,42 +5,39 @@ Uses Hypothesis library for property testing.
 **Feature: slidev-ppt-generator**
 """
 import pytest
-from hypothesis import given, strategies as st, settings, assume
-from unittest.mock import patch, MagicMock
+from hypothesis import given, example, strategies as st, settings, assume
+from unittest.mock import MagicMock
 import sys
 import os
 import re
+import types
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the module to be tested
 from pipeline import slides_generator
-
-
-class TestSlidevMarkdownFormatValidity:
-    """
-    **Feature: slidev-ppt-generator, Property 1: Slidev Markdown format validity**
-    **Validates: Requirements 1.2, 5.1**
-    
-    For any podcast script input, the generated output shall be valid Slidev Markdown containing:
-    - YAML frontmatter starting with `---` and containing `theme` key
-    - At least one slide separator (`---`)
-    - A title heading (`#`) on the first slide
-    """
-    
-    @settings(max_examples=100)
-    @given(
-        title=st.text(min_size=1, max_size=50).filter(lambda x: x.strip()),
-        style=st.sampled_from(['professional', 'minimal', 'creative'])
-    )
-    def test_slidev_markdown_format_validity(self, title, style):
-        """
-        Property: Generated Slidev Markdown must have valid format with frontmatter,
-        theme configuration, and proper slide structure.
-        """
-        # Mock LLM response with valid Slidev Markdown
-        mock_llm_response = f"""---
+import clients.hunyuan_api_client
+
+
+# Slidev Markdown structure checks
+_FRONTMATTER_RE = re.compile(r'^---\s*\n(.*?)\n---', re.DOTALL)
+_SEP_RE = re.compile(r'\n---\s*\n')
+_HEADING_RE = re.compile(r'^#\s+.+', re.MULTILINE)
+
+# Read-only config shared by every example
+_HUNYUAN_CFG = types.MappingProxyType({
+    "hunyuan_api_secret_id": "test",
+    "hunyuan_api_secret_key": "test",
+    "hunyuan_api_region": "ap-guangzhou",
+    "hunyuan_api_model": "hunyuan-turbos-latest",
+    "hunyuan_api_temperature": 0.8,
+    "hunyuan_api_top_p": 0.8,
+    "hunyuan_api_max_tokens": 8000,
+})
+
+# Canned LLM replies; ``{title}`` is filled in per example
+_FORMAT_RESPONSE_TEMPLATE = """---
 theme: seriph
 title: {title}
 class: text-center
@@ -70,61 +67,143 @@ class: text-center
 
 关键结论和行动建议
 """
-        
-        def mock_chat(messages, stream=False):
-            return {
-                "Choices": [{"Message": {"Content": mock_llm_response}}]
-            }
-        
-        mock_cfg = {
-            "hunyuan_api_secret_id": "test",
-            "hunyuan_api_secret_key": "test",
-            "hunyuan_api_region": "ap-guangzhou",
-            "hunyuan_api_model": "hunyuan-turbos-latest",
-            "hunyuan_api_temperature": 0.8,
-            "hunyuan_api_top_p": 0.8,
-            "hunyuan_api_max_tokens": 8000,
-        }
+
+_CONDENSED_RESPONSE = """---
+theme: seriph
+title: 测试演示文稿
+class: text-center
+---
+
+# 测试演示文稿
+
+基于 AI 播客内容生成
+
+---
+
+# 核心要点
+
+- 要点 1：关键信息
+- 要点 2：重要数据
+- 要点 3：主要结论
+
+---
+
+# 详细分析
+
+简洁的分析内容
+
+---
+
+# 总结
+
+关键结论
+"""
+
+_STRUCTURE_RESPONSE_TEMPLATE = """---
+theme: seriph
+title: {title}
+class: text-center
+---
+
+# {title}
+
+基于 AI 播客内容生成
+
+---
+
+# 核心要点
+
+- 要点 1
+- 要点 2
+
+---
+
+# 详细分析
+
+分析内容
+
+---
+
+# 深入讨论
+
+讨论内容
+
+---
+
+# 总结
+
+关键结论和行动建议
+"""
+
+
+def _reply(content):
+    """Build a chat stub that always answers with ``content``."""
+    response = {"Choices": [{"Message": {"Content": content}}]}
+    return lambda messages, stream=False: response
+
+
+@pytest.fixture(scope="class")
+def llm_client():
+    """
+    Stub LLM client shared by every example of a test class.
+    
+    extract_key_points imports HunyuanAPIClient inside the function, so
+    patching the attribute on clients.hunyuan_api_client is enough; no module
+    reload is needed. Tests set ``llm_client.chat`` per example.
+    """
+    client = MagicMock()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(clients.hunyuan_api_client, "HunyuanAPIClient", lambda **kwargs: client)
+        yield client
+
+
+class TestSlidevMarkdownFormatValidity:
+    """
+    **Feature: slidev-ppt-generator, Property 1: Slidev Markdown format validity**
+    **Validates: Requirements 1.2, 5.1**
+    
+    For any podcast script input, the generated output shall be valid Slidev Markdown containing:
+    - YAML frontmatter starting with `---` and containing `theme` key
+    - At least one slide separator (`---`)
+    - A title heading (`#`) on the first slide
+    """
+    
+    @given(
+        title=st.text(min_size=1, max_size=50).filter(lambda x: x.strip()),
+        style=st.sampled_from(['professional', 'minimal', 'creative'])
+    )
+    def test_slidev_markdown_format_validity(self, llm_client, title, style):
+        """
+        Property: Generated Slidev Markdown must have valid format with frontmatter,
+        theme configuration, and proper slide structure.
+        """
+        llm_client.chat = _reply(_FORMAT_RESPONSE_TEMPLATE.format(title=title))
         
         script = "这是一段测试播客脚本内容。主播A说了一些话，主播B回应了。"
         
-        # Create mock client instance
-        mock_client_instance = MagicMock()
-        mock_client_instance.chat = mock_chat
-        
-        # Patch the HunyuanAPIClient class in the slides_generator module
-        with patch.object(slides_generator, 'HunyuanAPIClient', create=True) as MockClient:
-            MockClient.return_value = mock_client_instance
-            
-            # Need to patch the import inside the function
-            with patch.dict('sys.modules', {'clients.hunyuan_api_client': MagicMock(HunyuanAPIClient=MockClient)}):
-                # Reload to pick up the mock
-                import importlib
-                importlib.reload(slides_generator)
-                
-                result = slides_generator.extract_key_points(
-                    cfg=mock_cfg,
-                    script=script,
-                    title=title,
-                    style=style
-                )
+        result = slides_generator.extract_key_points(
+            cfg=_HUNYUAN_CFG,
+            script=script,
+            title=title,
+            style=style
+        )
         
         # Verify frontmatter exists and starts with ---
         assert result.startswith('---'), "Slidev Markdown must start with frontmatter (---)"
         
         # Verify theme key exists in frontmatter
-        frontmatter_match = re.match(r'^---\s*\n(.*?)\n---', result, re.DOTALL)
+        frontmatter_match = _FRONTMATTER_RE.match(result)
         assert frontmatter_match, "Frontmatter must be properly closed with ---"
         frontmatter_content = frontmatter_match.group(1)
         assert 'theme:' in frontmatter_content, "Frontmatter must contain 'theme' key"
         
         # Verify at least one slide separator exists (beyond frontmatter)
         content_after_frontmatter = result[frontmatter_match.end():]
-        slide_separators = re.findall(r'\n---\s*\n', content_after_frontmatter)
+        slide_separators = _SEP_RE.findall(content_after_frontmatter)
         assert len(slide_separators) >= 1, "Must have at least one slide separator after frontmatter"
         
         # Verify title heading exists
-        assert re.search(r'^#\s+.+', result, re.MULTILINE), "Must have a title heading (#)"
+        assert _HEADING_RE.search(result), "Must have a title heading (#)"
 
 
 
@@ -138,11 +217,10 @@ class TestContentTransformation:
     indicating key points extraction rather than verbatim copying.
     """
     
-    @settings(max_examples=100)
     @given(
         script_length=st.integers(min_value=600, max_value=3000)
     )
-    def test_content_transformation_not_verbatim(self, script_length):
+    def test_content_transformation_not_verbatim(self, llm_client, script_length):
         """
         Property: Generated slides should be significantly shorter than the original script,
         demonstrating key points extraction rather than verbatim copying.
@@ -153,68 +231,16 @@ class TestContentTransformation:
         
         assume(len(script) > 500)  # Ensure script meets minimum length requirement
         
-        # Mock LLM response with condensed content (key points extraction)
-        # The response should be significantly shorter than the input
-        mock_llm_response = """---
-theme: seriph
-title: 测试演示文稿
-class: text-center
----
-
-# 测试演示文稿
-
-基于 AI 播客内容生成
-
----
-
-# 核心要点
-
-- 要点 1：关键信息
-- 要点 2：重要数据
-- 要点 3：主要结论
-
----
-
-# 详细分析
-
-简洁的分析内容
-
----
-
-# 总结
-
-关键结论
-"""
-        
-        def mock_chat(messages, stream=False):
-            return {
-                "Choices": [{"Message": {"Content": mock_llm_response}}]
-            }
+        # LLM replies with condensed content (key points extraction),
+        # significantly shorter than the input
+        llm_client.chat = _reply(_CONDENSED_RESPONSE)
         
-        mock_cfg = {
-            "hunyuan_api_secret_id": "test",
-            "hunyuan_api_secret_key": "test",
-            "hunyuan_api_region": "ap-guangzhou",
-            "hunyuan_api_model": "hunyuan-turbos-latest",
-            "hunyuan_api_temperature": 0.8,
-            "hunyuan_api_top_p": 0.8,
-            "hunyuan_api_max_tokens": 8000,
-        }
-        
-        # Create mock client instance
-        mock_client_instance = MagicMock()
-        mock_client_instance.chat = mock_chat
-        
-        with patch.dict('sys.modules', {'clients.hunyuan_api_client': MagicMock(HunyuanAPIClient=lambda **kwargs: mock_client_instance)}):
-            import importlib
-            importlib.reload(slides_generator)
-            
-            result = slides_generator.extract_key_points(
-                cfg=mock_cfg,
-                script=script,
-                title="测试演示文稿",
-                style="professional"
-            )
+        result = slides_generator.extract_key_points(
+            cfg=_HUNYUAN_CFG,
+            script=script,
+            title="测试演示文稿",
+            style="professional"
+        )
         
         # Verify the output is significantly shorter than input (< 50%)
         result_length = len(result)
@@ -237,83 +263,25 @@ class TestSlideStructureCompleteness:
     - A summary/conclusion slide (last slide containing keywords like "总结", "结论", "Summary", "Conclusion")
     """
     
-    @settings(max_examples=100)
     @given(
         title=st.text(min_size=2, max_size=30).filter(lambda x: x.strip() and not any(c in x for c in ['#', '---', '\n']))
     )
-    def test_slide_structure_completeness(self, title):
+    def test_slide_structure_completeness(self, llm_client, title):
         """
         Property: Generated slides must have complete structure with title slide,
         content slides, and summary slide.
         """
-        # Mock LLM response with complete slide structure
-        mock_llm_response = f"""---
-theme: seriph
-title: {title}
-class: text-center
----
-
-# {title}
-
-基于 AI 播客内容生成
-
----
-
-# 核心要点
-
-- 要点 1
-- 要点 2
-
----
-
-# 详细分析
-
-分析内容
-
----
-
-# 深入讨论
-
-讨论内容
-
----
-
-# 总结
-
-关键结论和行动建议
-"""
-        
-        def mock_chat(messages, stream=False):
-            return {
-                "Choices": [{"Message": {"Content": mock_llm_response}}]
-            }
-        
-        mock_cfg = {
-            "hunyuan_api_secret_id": "test",
-            "hunyuan_api_secret_key": "test",
-            "hunyuan_api_region": "ap-guangzhou",
-            "hunyuan_api_model": "hunyuan-turbos-latest",
-            "hunyuan_api_temperature": 0.8,
-            "hunyuan_api_top_p": 0.8,
-            "hunyuan_api_max_tokens": 8000,
-        }
+        # LLM replies with a complete slide structure
+        llm_client.chat = _reply(_STRUCTURE_RESPONSE_TEMPLATE.format(title=title))
         
         script = "这是一段测试播客脚本内容。"
         
-        # Create mock client instance
-        mock_client_instance = MagicMock()
-        mock_client_instance.chat = mock_chat
-        
-        with patch.dict('sys.modules', {'clients.hunyuan_api_client': MagicMock(HunyuanAPIClient=lambda **kwargs: mock_client_instance)}):
-            import importlib
-            importlib.reload(slides_generator)
-            
-            result = slides_generator.extract_key_points(
-                cfg=mock_cfg,
-                script=script,
-                title=title,
-                style="professional"
-            )
+        result = slides_generator.extract_key_points(
+            cfg=_HUNYUAN_CFG,
+            script=script,
+            title=title,
+            style="professional"
+        )
         
         # Parse the slides
         slides = slides_generator.parse_slidev_markdown(result)
@@ -334,40 +302,19 @@ class: text-center
         assert has_summary, f"Last slide must contain summary keywords. Got: {last_slide_content[:200]}"
 
 
-class TestExportFormatValidity:
-    """
-    **Feature: slidev-ppt-generator, Property 4: Export format validity**
-    **Validates: Requirements 4.1, 4.2**
-    
-    For any valid Slidev Markdown and export format (pdf/pptx), the exported file shall:
-    - Have the correct file extension
-    - Have valid file magic bytes (PDF: `%PDF`, PPTX: `PK` ZIP header)
-    - Have file size > 0 bytes
-    """
-    
-    @settings(max_examples=100, deadline=None)
-    @given(
-        title=st.text(min_size=1, max_size=30).filter(lambda x: x.strip() and not any(c in x for c in ['#', '---', '\n', '<', '>', ':', '"', '/', '\\', '|', '?', '*'])),
-        num_slides=st.integers(min_value=3, max_value=8)
-    )
-    def test_pdf_export_format_validity(self, title, num_slides):
-        """
-        Property: Exported PDF files must have correct extension, valid magic bytes, and non-zero size.
-        """
-        import tempfile
-        
-        # Generate valid Slidev Markdown
-        slides_content = []
-        for i in range(num_slides - 2):  # -2 for title and summary slides
-            slides_content.append(f"""---
+def _deck_markdown(title, num_slides):
+    """Valid Slidev Markdown: a title slide, ``num_slides - 2`` content slides and a summary."""
+    slides_content = []
+    for i in range(num_slides - 2):  # -2 for title and summary slides
+        slides_content.append(f"""---
 
 # 内容 {i + 1}
 
 - 要点 {i + 1}.1
 - 要点 {i + 1}.2
 """)
-        
-        markdown = f"""---
+    
+    return f"""---
 theme: seriph
 title: {title}
 class: text-center
@@ -384,112 +331,109 @@ class: text-center
 
 关键结论和行动建议
 """
+
+
+def _export_or_skip(exporter, markdown, output_path):
+    """Run an exporter, skipping the test when its optional library is not installed."""
+    try:
+        return exporter(markdown, output_path)
+    except ImportError as e:
+        pytest.skip(f"Export library not available: {e}")
+    except RuntimeError as e:
+        if "需要安装" in str(e) or "not available" in str(e).lower():
+            pytest.skip(f"Export library not available: {e}")
+        raise
+
+
+@pytest.fixture(scope="session")
+def exported_pdf(tmp_path_factory):
+    """One representative PDF export; the format checks do not depend on the deck content."""
+    output_path = str(tmp_path_factory.mktemp("slides") / "deck.pdf")
+    result_path = _export_or_skip(slides_generator.export_to_pdf, _deck_markdown("固定", 4), output_path)
+    with open(result_path, 'rb') as f:
+        return result_path, f.read()
+
+
+@pytest.fixture(scope="session")
+def exported_pptx(tmp_path_factory):
+    """One representative PPTX export; the format checks do not depend on the deck content."""
+    output_path = str(tmp_path_factory.mktemp("slides") / "deck.pptx")
+    result_path = _export_or_skip(slides_generator.export_to_pptx, _deck_markdown("固定", 4), output_path)
+    with open(result_path, 'rb') as f:
+        return result_path, f.read()
+
+
+_EXPORT_TITLES = st.text(min_size=1, max_size=30).filter(
+    lambda x: x.strip() and not any(c in x for c in ['#', '---', '\n', '<', '>', ':', '"', '/', '\\', '|', '?', '*'])
+)
+
+
+class TestExportFormatValidity:
+    """
+    **Feature: slidev-ppt-generator, Property 4: Export format validity**
+    **Validates: Requirements 4.1, 4.2**
+    
+    For any valid Slidev Markdown and export format (pdf/pptx), the exported file shall:
+    - Have the correct file extension
+    - Have valid file magic bytes (PDF: `%PDF`, PPTX: `PK` ZIP header)
+    - Have file size > 0 bytes
+    """
+    
+    def test_pdf_export_format_validity(self, exported_pdf):
+        """
+        Property: Exported PDF files must have correct extension, valid magic bytes, and non-zero size.
+        """
+        result_path, data = exported_pdf
         
-        # Create temp file for output
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
-            output_path = f.name
+        # Verify correct file extension
+        assert result_path.endswith('.pdf'), f"PDF file must have .pdf extension, got: {result_path}"
         
-        try:
-            # Export to PDF
-            result_path = slides_generator.export_to_pdf(markdown, output_path)
-            
-            # Verify correct file extension
-            assert result_path.endswith('.pdf'), f"PDF file must have .pdf extension, got: {result_path}"
-            
-            # Verify file exists and has non-zero size
-            assert os.path.exists(result_path), f"PDF file must exist at {result_path}"
-            file_size = os.path.getsize(result_path)
-            assert file_size > 0, f"PDF file must have non-zero size, got: {file_size}"
-            
-            # Verify PDF magic bytes (%PDF)
-            with open(result_path, 'rb') as f:
-                magic_bytes = f.read(4)
-                assert magic_bytes == b'%PDF', f"PDF file must start with %PDF magic bytes, got: {magic_bytes}"
+        # Verify file has non-zero size
+        assert len(data) > 0, "PDF file must have non-zero size"
         
-        except ImportError as e:
-            # Skip test if weasyprint/reportlab not installed
-            pytest.skip(f"PDF export library not available: {e}")
-        except RuntimeError as e:
-            if "需要安装" in str(e) or "not available" in str(e).lower():
-                pytest.skip(f"PDF export library not available: {e}")
-            raise
-        finally:
-            # Cleanup
-            if os.path.exists(output_path):
-                os.remove(output_path)
+        # Verify PDF magic bytes (%PDF)
+        assert data[:4] == b'%PDF', f"PDF file must start with %PDF magic bytes, got: {data[:4]}"
     
-    @settings(max_examples=100)
-    @given(
-        title=st.text(min_size=1, max_size=30).filter(lambda x: x.strip() and not any(c in x for c in ['#', '---', '\n', '<', '>', ':', '"', '/', '\\', '|', '?', '*'])),
-        num_slides=st.integers(min_value=3, max_value=8)
-    )
-    def test_pptx_export_format_validity(self, title, num_slides):
+    def test_pptx_export_format_validity(self, exported_pptx):
         """
         Property: Exported PPTX files must have correct extension, valid magic bytes (PK ZIP header), and non-zero size.
         """
-        import tempfile
+        result_path, data = exported_pptx
         
-        # Generate valid Slidev Markdown
-        slides_content = []
-        for i in range(num_slides - 2):  # -2 for title and summary slides
-            slides_content.append(f"""---
-
-# 内容 {i + 1}
-
-- 要点 {i + 1}.1
-- 要点 {i + 1}.2
-""")
+        # Verify correct file extension
+        assert result_path.endswith('.pptx'), f"PPTX file must have .pptx extension, got: {result_path}"
         
-        markdown = f"""---
-theme: seriph
-title: {title}
-class: text-center
----
-
-# {title}
-
-基于 AI 播客内容生成
-
-{''.join(slides_content)}
----
-
-# 总结
-
-关键结论和行动建议
-"""
+        # Verify file has non-zero size
+        assert len(data) > 0, "PPTX file must have non-zero size"
         
-        # Create temp file for output
-        with tempfile.NamedTemporaryFile(suffix='.pptx', delete=False) as f:
-            output_path = f.name
+        # Verify PPTX magic bytes (PK ZIP header)
+        assert data[:2] == b'PK', f"PPTX file must start with PK (ZIP) magic bytes, got: {data[:2]}"
+    
+    @settings(max_examples=5)
+    @example(title="固定", num_slides=4)
+    @given(title=_EXPORT_TITLES, num_slides=st.integers(min_value=3, max_value=8))
+    def test_pdf_export_accepts_varied_decks(self, tmp_path_factory, title, num_slides):
+        """
+        Property: PDF export succeeds for arbitrary titles and slide counts.
+        """
+        output_path = str(tmp_path_factory.mktemp("pdf") / "deck.pdf")
+        result_path = _export_or_skip(slides_generator.export_to_pdf, _deck_markdown(title, num_slides), output_path)
         
-        try:
-            # Export to PPTX
-            result_path = slides_generator.export_to_pptx(markdown, output_path)
-            
-            # Verify correct file extension
-            assert result_path.endswith('.pptx'), f"PPTX file must have .pptx extension, got: {result_path}"
-            
-            # Verify file exists and has non-zero size
-            assert os.path.exists(result_path), f"PPTX file must exist at {result_path}"
-            file_size = os.path.getsize(result_path)
-            assert file_size > 0, f"PPTX file must have non-zero size, got: {file_size}"
-            
-            # Verify PPTX magic bytes (PK ZIP header)
-            with open(result_path, 'rb') as f:
-                magic_bytes = f.read(2)
-                assert magic_bytes == b'PK', f"PPTX file must start with PK (ZIP) magic bytes, got: {magic_bytes}"
+        with open(result_path, 'rb') as f:
+            assert f.read(4) == b'%PDF', "PDF file must start with %PDF magic bytes"
+    
+    @settings(max_examples=5)
+    @example(title="固定", num_slides=4)
+    @given(title=_EXPORT_TITLES, num_slides=st.integers(min_value=3, max_value=8))
+    def test_pptx_export_accepts_varied_decks(self, tmp_path_factory, title, num_slides):
+        """
+        Property: PPTX export succeeds for arbitrary titles and slide counts.
+        """
+        output_path = str(tmp_path_factory.mktemp("pptx") / "deck.pptx")
+        result_path = _export_or_skip(slides_generator.export_to_pptx, _deck_markdown(title, num_slides), output_path)
         
-        except ImportError as e:
-            # Skip test if python-pptx not installed
-            pytest.skip(f"PPTX export library not available: {e}")
-        except RuntimeError as e:
-            if "需要安装" in str(e) or "not available" in str(e).lower():
-                pytest.skip(f"PPTX export library not available: {e}")
-            raise
-        finally:
-            # Cleanup
-            if os.path.exists(output_path):
-                os.remove(output_path)
+        with open(result_path, 'rb') as f:
+            assert f.read(2) == b'PK', "PPTX file must start with PK (ZIP) magic bytes"
 
 
 if __name__ == "__main__":
@@ -505,7 +449,6 @@ class TestAPIResponseContainsFileURL:
     `file_url` field pointing to a valid COS URL, or a valid `file_path` for local fallback.
     """
     
-    @settings(max_examples=100)
     @given(
         title=st.text(min_size=1, max_size=30).filter(lambda x: x.strip() and not any(c in x for c in ['#', '---', '\n', '<', '>', ':', '"', '/', '\\', '|', '?', '*'])),
         format_type=st.sampled_from(['pdf', 'pptx'])
@@ -605,7 +548,6 @@ class TestAPIErrorResponsesIncludeMessage:
     contain an `error` or `detail` field with a non-empty error message.
     """
     
-    @settings(max_examples=100)
     @given(
         invalid_input_type=st.sampled_from([
             'empty_script',
@@ -1,96 +1,553 @@
 import os
 import io
+import atexit
+import functools
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List
+import numpy as np
 from pydub import AudioSegment
-from pydub.utils import which
+from pydub.utils import which, mediainfo
 
 
 def ensure_dir(path: str) -> None:
-    if not os.path.exists(path):
-        os.makedirs(path, exist_ok=True)
+    os.makedirs(path, exist_ok=True)
 
 
-def _ensure_ffmpeg() -> Optional[str]:
-    """尽力定位并注入 ffmpeg/ffprobe 到当前进程环境，返回 ffmpeg 可执行路径。"""
+def _scan_for_ffmpeg(root: str, max_depth: int, name_filter: Optional[str]) -> Optional[str]:
+    """在 root 下按层（BFS）查找 ffmpeg.exe，最多 max_depth 层，命中第一个即返回。
+    name_filter 非空时，第一层只进入名称含该字符串（不区分大小写）的目录。"""
+    level = [root]
+    for depth in range(1, max_depth + 1):
+        next_level = []
+        for d in level:
+            try:
+                with os.scandir(d) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for e in entries:
+                if e.name.lower() == "ffmpeg.exe" and e.is_file():
+                    return e.path
+            for e in entries:
+                if not e.is_dir(follow_symlinks=False):
+                    continue
+                if depth == 1 and name_filter and name_filter not in e.name.lower():
+                    continue
+                next_level.append(e.path)
+        level = next_level
+    return None
+
+
+def _find_winget_ffmpeg(local_pkg: str) -> Optional[str]:
+    """在 WinGet Packages 目录中查找 ffmpeg.exe，命中第一个即返回。"""
+    # 常见布局为 Packages/<*FFmpeg*>/<版本>/bin/ffmpeg.exe：先只进入名称含 ffmpeg 的包目录
+    return (_scan_for_ffmpeg(local_pkg, 4, "ffmpeg")
+            # 兜底：包名不含 ffmpeg 时，同样深度内扫描全部目录
+            or _scan_for_ffmpeg(local_pkg, 4, None))
+
+
+# 已注入过环境（PATH/FFPROBE、pydub 类属性）的 ffmpeg 目录
+_activated_dirs = set()
+
+
+def _activate_ffmpeg(path: str) -> str:
+    """让 pydub 使用指定的 ffmpeg，并尽量配好同目录下的 ffprobe 与 PATH。"""
+    if AudioSegment.converter != path:
+        AudioSegment.converter = AudioSegment.ffmpeg = path
+    bindir = os.path.dirname(path)
+    if bindir in _activated_dirs:
+        return path
+    probe = os.path.join(bindir, "ffprobe.exe" if os.name == 'nt' else "ffprobe")
+    if os.path.exists(probe):
+        AudioSegment.ffprobe = probe
+        os.environ["FFPROBE"] = probe
+    # 按目录项比较，避免子串误判；已在 PATH 中时不重建整个 PATH 字符串
+    path_env = os.environ.get("PATH", "")
+    if bindir not in path_env.split(os.pathsep):
+        os.environ["PATH"] = os.pathsep.join((bindir, path_env)) if path_env else bindir
+    _activated_dirs.add(bindir)
+    return path
+
+
+def _ffmpeg_path_cache_files() -> List[str]:
+    # 优先放在用户目录，不可写时退到系统临时目录
+    return [
+        os.path.join(os.path.expanduser("~"), ".kpodcast", "ffmpeg_path"),
+        os.path.join(tempfile.gettempdir(), "kpodcast_ffmpeg_path"),
+    ]
+
+
+def _read_ffmpeg_path_cache() -> Optional[str]:
+    """读取之前扫描到的 ffmpeg 路径；文件已不存在时视为失效。"""
+    for cache_file in _ffmpeg_path_cache_files():
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                path = f.read().strip()
+        except OSError:
+            continue
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def _write_ffmpeg_path_cache(path: str) -> None:
+    """把扫描到的 ffmpeg 路径写到磁盘，新进程启动时免去目录遍历；写失败不影响使用。"""
+    for cache_file in _ffmpeg_path_cache_files():
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                f.write(path)
+            return
+        except OSError:
+            continue
+
+
+@functools.lru_cache(maxsize=1)
+def _locate_ffmpeg() -> Optional[str]:
+    """
+    定位 ffmpeg 可执行文件（只查找，不修改环境），结果按进程缓存：
+    PATH 查找与 WinGet 目录遍历只执行一次。
+    """
+    # 0) 已配置好的绝对路径（pydub 默认值是裸名 "ffmpeg"，不会命中）
+    cur = getattr(AudioSegment, "converter", None)
+    if isinstance(cur, str) and os.path.isabs(cur) and os.path.exists(cur):
+        return cur
     # 1) PATH/环境变量
     p = os.environ.get("FFMPEG_BINARY") or which("ffmpeg")
     if p and os.path.exists(p):
-        AudioSegment.converter = p
-        AudioSegment.ffmpeg = p
-        # 尝试 ffprobe
-        probedir = os.path.dirname(p)
-        probe = os.path.join(probedir, "ffprobe.exe") if os.name == 'nt' else os.path.join(probedir, "ffprobe")
-        if os.path.exists(probe):
-            AudioSegment.ffprobe = probe
-            os.environ["FFPROBE"] = probe
-        if probedir not in (os.environ.get("PATH") or ""):
-            os.environ["PATH"] = probedir + os.pathsep + os.environ.get("PATH", "")
         return p
-    # 2) 常见安装位置
+    # 2) 上次进程扫描到的路径
+    p = _read_ffmpeg_path_cache()
+    if p:
+        return p
+    # 3) 常见安装位置
     candidates = [
         r"C:\\Program Files\\ffmpeg\\bin\\ffmpeg.exe",
         r"C:\\Program Files\\FFmpeg\\bin\\ffmpeg.exe",
         r"C:\\ffmpeg\\bin\\ffmpeg.exe",
         r"C:\\ProgramData\\chocolatey\\bin\\ffmpeg.exe",
     ]
-    # 3) WinGet 目录下递归查找
+    found = next((c for c in candidates if os.path.exists(c)), None)
+    # 4) 前面都未命中时才在 WinGet 目录下查找
     local_pkg = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "WinGet", "Packages")
-    if os.path.isdir(local_pkg):
-        for root, _, files in os.walk(local_pkg):
-            if "ffmpeg.exe" in files:
-                candidates.append(os.path.join(root, "ffmpeg.exe"))
-                break
-    for c in candidates:
-        if c and os.path.exists(c):
-            os.environ["FFMPEG_BINARY"] = c
-            AudioSegment.converter = c
-            AudioSegment.ffmpeg = c
-            dirc = os.path.dirname(c)
-            probe = os.path.join(dirc, "ffprobe.exe") if os.name == 'nt' else os.path.join(dirc, "ffprobe")
-            if os.path.exists(probe):
-                AudioSegment.ffprobe = probe
-                os.environ["FFPROBE"] = probe
-            if dirc not in (os.environ.get("PATH") or ""):
-                os.environ["PATH"] = dirc + os.pathsep + os.environ.get("PATH", "")
-            return c
-    return None
+    if not found and os.path.isdir(local_pkg):
+        found = _find_winget_ffmpeg(local_pkg)
+    if found:
+        _write_ffmpeg_path_cache(found)
+    return found
+
+
+def _ensure_ffmpeg() -> Optional[str]:
+    """尽力定位并注入 ffmpeg/ffprobe 到当前进程环境，返回 ffmpeg 可执行路径。"""
+    path = _locate_ffmpeg()
+    if path:
+        os.environ.setdefault("FFMPEG_BINARY", path)
+        _activate_ffmpeg(path)
+    return path
+
+
+# PCM 采样宽度（字节）到 ffmpeg 原始格式；raw_data 是本机字节序
+_PCM_ENDIAN = "le" if sys.byteorder == "little" else "be"
+_FFMPEG_PCM_FORMATS = {1: "s8", 2: "s16" + _PCM_ENDIAN, 4: "s32" + _PCM_ENDIAN}
+
+
+def _export_mp3_fast(seg: AudioSegment, out_path: str, bitrate: str = "192k") -> str:
+    """
+    把 PCM 经 stdin 直接交给 ffmpeg 编码为 mp3，省去 pydub export 的临时 wav 写读。
+    ffmpeg 不可用、采样宽度不支持或编码失败时回退到 seg.export。
+    """
+    ffmpeg = _ensure_ffmpeg()
+    pcm_format = _FFMPEG_PCM_FORMATS.get(seg.sample_width)
+    if ffmpeg and pcm_format:
+        try:
+            subprocess.run(
+                [ffmpeg, "-y", "-loglevel", "error",
+                 "-f", pcm_format, "-ar", str(seg.frame_rate), "-ac", str(seg.channels), "-i", "pipe:0",
+                 "-b:a", bitrate, "-f", "mp3", out_path],
+                input=seg.raw_data, check=True, capture_output=True,
+            )
+            return out_path
+        except (OSError, subprocess.CalledProcessError):
+            pass
+    seg.export(out_path, format="mp3", bitrate=bitrate)
+    return out_path
+
+
+@functools.lru_cache(maxsize=8)
+def _load_segment(path: str, mtime: float) -> AudioSegment:
+    """
+    解码音频文件，结果按 (路径, 修改时间) 缓存。
+
+    背景音乐只有少数几首，每期节目都会用到；AudioSegment 不可变，
+    多处、多线程共享同一对象是安全的。
+    """
+    return AudioSegment.from_file(path)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_intro(intro_path: str, mtime: float, gain_db: float) -> AudioSegment:
+    """
+    解码片头并做淡入淡出与增益调整，结果按 (路径, 修改时间, 增益) 缓存。
+
+    同一片头在多期节目间复用时不再重复启动 ffmpeg 解码；文件被替换后
+    mtime 变化，缓存自然失效。
+    """
+    return AudioSegment.from_file(intro_path).fade_in(100).fade_out(400) + gain_db
 
 
 def mix_intro_with_voice(intro_path: Optional[str], voice_path: str, out_path: str, duck_db: float = -6.0) -> str:
     """将片头音乐与语音文件做淡入/淡出拼接并导出 mp3。"""
+    has_intro = bool(intro_path and os.path.exists(intro_path))
+    if not has_intro and voice_path.lower().endswith(".mp3"):
+        # 无片头时语音本身就是结果，直接复制，不做 mp3 解码再编码
+        if os.path.abspath(voice_path) != os.path.abspath(out_path):
+            shutil.copyfile(voice_path, out_path)
+        return out_path
     _ensure_ffmpeg()
     voice = AudioSegment.from_file(voice_path)
-    if intro_path and os.path.exists(intro_path):
-        intro = AudioSegment.from_file(intro_path)
-        intro = intro.fade_in(100).fade_out(400) + duck_db
+    if has_intro:
+        intro = _load_intro(intro_path, os.path.getmtime(intro_path), duck_db)
         mixed = intro.append(voice, crossfade=200)
     else:
         mixed = voice
-    mixed.export(out_path, format="mp3", bitrate="192k")
+    _export_mp3_fast(mixed, out_path)
     return out_path
 
 
-def concat_voice_segments(audio_bytes_list: List[bytes], pause_ms: int = 200) -> AudioSegment:
-    """把多段 mp3 二进制拼接为一个 AudioSegment，中间加入短暂停顿。"""
+def _decode_mp3(data: bytes) -> AudioSegment:
+    return AudioSegment.from_file(io.BytesIO(data), format="mp3")
+
+
+@functools.lru_cache(maxsize=16)
+def _silence(duration_ms: int, frame_rate: int = 11025) -> AudioSegment:
+    """复用同参数的静音段；AudioSegment 的运算都返回新对象，共享是安全的。"""
+    return AudioSegment.silent(duration=duration_ms, frame_rate=frame_rate)
+
+
+# 拼接结果开头的静音
+_LEAD_SILENCE = _silence(100)
+
+# PCM 采样宽度（字节）到 numpy 类型
+_PCM_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+def _fade_in_raw(seg: AudioSegment, fade_ms: int) -> bytes:
+    """返回段首 fade_ms 毫秒做线性淡入后的整段 PCM，用 numpy 一次性计算增益斜坡。"""
+    dtype = _PCM_DTYPES.get(seg.sample_width)
+    if dtype is None:
+        return (seg[:fade_ms].fade(from_gain=-120, start=0, end=float('inf')) + seg[fade_ms:]).raw_data
+    raw = seg.raw_data
+    n = min(int(seg.frame_count()), int(seg.frame_rate * fade_ms / 1000))
+    head_len = n * seg.frame_width
+    # 只对接缝处的 n 帧做乘法，其余字节原样拼回，不复制整段样本
+    head = np.frombuffer(raw, dtype=dtype, count=n * seg.channels).reshape(n, seg.channels)
+    ramp = np.linspace(0.0, 1.0, n, endpoint=False)[:, None]
+    return (head * ramp).astype(dtype).tobytes() + raw[head_len:]
+
+
+@functools.lru_cache(maxsize=16)
+def _fade_envelope(fade_ms: int, frame_rate: int, direction: str) -> np.ndarray:
+    """线性淡入（"in"）或淡出（"out"）增益曲线，形状 (帧数, 1)；按参数缓存，只读。"""
+    n = int(frame_rate * fade_ms / 1000)
+    env = np.linspace(0.0, 1.0, n, endpoint=False, dtype=np.float32)
+    if direction == "out":
+        env = env[::-1].copy()
+    env = env[:, None]
+    env.flags.writeable = False
+    return env
+
+
+def _apply_fades(seg: AudioSegment, fade_in_ms: int, fade_out_ms: int, gain_db: float = 0.0) -> AudioSegment:
+    """
+    等价于 (seg + gain_db).fade_in(fade_in_ms).fade_out(fade_out_ms)。
+
+    音量调整与首尾淡入淡出合并为一次乘法：整段乘以固定增益，首尾再乘以
+    缓存的增益曲线，最后饱和截断。不调音量时只处理首尾，中间原样复制。
+    """
+    dtype = _PCM_DTYPES.get(seg.sample_width)
+    if dtype is None:
+        return (seg + gain_db).fade_in(fade_in_ms).fade_out(fade_out_ms)
+    samples = np.frombuffer(seg.raw_data, dtype=dtype).reshape(-1, seg.channels)
+    env_in = _fade_envelope(fade_in_ms, seg.frame_rate, "in")[:len(samples)]
+    env_out = _fade_envelope(fade_out_ms, seg.frame_rate, "out")
+    # 取曲线末尾 len(samples) 帧；不能写成 [-len(samples):]，空段时 [-0:] 会取到整条曲线
+    env_out = env_out[max(0, len(env_out) - len(samples)):]
+    n_in, n_out = len(env_in), len(env_out)
+    if gain_db:
+        out = np.multiply(samples, np.float32(10 ** (gain_db / 20)), dtype=np.float32)
+        info = np.iinfo(dtype)
+        np.clip(out, info.min, info.max, out=out)
+    else:
+        out = samples.copy()
+    if n_in:
+        out[:n_in] = out[:n_in] * env_in
+    if n_out:
+        out[-n_out:] = out[-n_out:] * env_out
+    return seg._spawn(out.astype(dtype, copy=False).tobytes())
+
+
+def _iter_joined_pcm(lead: AudioSegment, segs: List[AudioSegment], gap: AudioSegment,
+                     crossfade_ms: int = 0):
+    """
+    按顺序产出拼接结果的 PCM 片段，结果与逐段 append(seg, crossfade).append(gap) 等价。
+
+    每段前面都是静音，交叉淡化只相当于该段开头淡入、前面的静音缩短
+    crossfade 时长。调用方需先用 AudioSegment._sync 统一各段格式。
+    """
+    xf = crossfade_ms
+    gap_before_next = gap[:-xf].raw_data if xf else gap.raw_data
+    yield lead[:-xf].raw_data if xf else lead.raw_data
+    last = len(segs) - 1
+    for i, seg in enumerate(segs):
+        yield _fade_in_raw(seg, xf) if xf else seg.raw_data
+        yield gap.raw_data if i == last else gap_before_next
+
+
+def _join_with_silence(lead: AudioSegment, segs: List[AudioSegment], gap: AudioSegment,
+                       crossfade_ms: int = 0) -> AudioSegment:
+    """
+    一次性拼接 PCM 数据，避免逐段 append 每次复制整个累积缓冲区（O(N²)）。
+    """
+    lead, gap, *segs = AudioSegment._sync(lead, gap, *segs)
+    return lead._spawn(b"".join(_iter_joined_pcm(lead, segs, gap, crossfade_ms)))
+
+
+def _decode_segments(audio_bytes_list: List[bytes]) -> List[AudioSegment]:
+    # 先在主线程完成 ffmpeg 定位，避免解码线程并发修改环境变量
     _ensure_ffmpeg()
-    final = AudioSegment.silent(duration=100)
-    gap = AudioSegment.silent(duration=max(0, int(pause_ms)))
-    for b in audio_bytes_list:
-        seg = AudioSegment.from_file(io.BytesIO(b), format="mp3")
-        final = final.append(seg, crossfade=50).append(gap, crossfade=0)
+    if len(audio_bytes_list) <= 1:
+        return [_decode_mp3(b) for b in audio_bytes_list]
+    # 每段解码都会启动一个 ffmpeg 子进程，用线程池并行等待；
+    # 线程只是等待子进程，线程数按段数而不是 CPU 数取
+    with ThreadPoolExecutor(max_workers=min(8, len(audio_bytes_list))) as ex:
+        return list(ex.map(_decode_mp3, audio_bytes_list))
+
+
+def _can_join_raw(segs: List[AudioSegment], pause_ms: int, crossfade_ms: int) -> bool:
+    # 停顿或某段短于交叉淡化时长时，只能逐段 append
+    return bool(segs) and pause_ms >= crossfade_ms and all(len(seg) >= crossfade_ms for seg in segs)
+
+
+def _append_segments(segs: List[AudioSegment], pause_ms: int, crossfade_ms: int) -> AudioSegment:
+    gap = _silence(pause_ms)
+    if _can_join_raw(segs, pause_ms, crossfade_ms):
+        return _join_with_silence(_LEAD_SILENCE, segs, gap, crossfade_ms)
+    final = _LEAD_SILENCE
+    for seg in segs:
+        final = final.append(seg, crossfade=crossfade_ms).append(gap, crossfade=0)
     return final
 
 
+def concat_voice_segments(audio_bytes_list: List[bytes], pause_ms: int = 200,
+                          crossfade_ms: int = 0) -> AudioSegment:
+    """
+    把多段 mp3 二进制拼接为一个 AudioSegment，中间加入短暂停顿。
+
+    TTS 分段的边界本身是干净的，默认直接硬拼接；crossfade_ms > 0 时
+    每段开头与前面的停顿做交叉淡化。只需落盘时用 concat_voice_segments_to_file。
+    """
+    pause_ms = max(0, int(pause_ms))
+    crossfade_ms = max(0, int(crossfade_ms))
+    return _append_segments(_decode_segments(audio_bytes_list), pause_ms, crossfade_ms)
+
+
+def concat_voice_segments_to_file(audio_bytes_list: List[bytes], out_path: str, pause_ms: int = 200,
+                                  crossfade_ms: int = 0, bitrate: str = "192k") -> str:
+    """
+    与 concat_voice_segments 相同的拼接，但把 PCM 逐段写入 ffmpeg stdin 直接编码为 mp3，
+    不在内存中拼出完整的 AudioSegment，长节目的峰值内存约减半。
+
+    ffmpeg 不可用或无法流式拼接时，回退到 concat_voice_segments 后再导出。
+    """
+    pause_ms = max(0, int(pause_ms))
+    crossfade_ms = max(0, int(crossfade_ms))
+    segs = _decode_segments(audio_bytes_list)
+    ffmpeg = _ensure_ffmpeg()
+    if ffmpeg and _can_join_raw(segs, pause_ms, crossfade_ms):
+        lead, gap, *segs = AudioSegment._sync(_LEAD_SILENCE, _silence(pause_ms), *segs)
+        pcm_format = _FFMPEG_PCM_FORMATS.get(lead.sample_width)
+        if pcm_format:
+            try:
+                proc = subprocess.Popen(
+                    [ffmpeg, "-y", "-loglevel", "error",
+                     "-f", pcm_format, "-ar", str(lead.frame_rate), "-ac", str(lead.channels), "-i", "pipe:0",
+                     "-b:a", bitrate, "-f", "mp3", out_path],
+                    stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+            except OSError:
+                proc = None
+            if proc is not None:
+                written = False
+                try:
+                    for chunk in _iter_joined_pcm(lead, segs, gap, crossfade_ms):
+                        proc.stdin.write(chunk)
+                    written = True
+                except Exception:
+                    # ffmpeg 提前退出或生成 PCM 出错：结束 ffmpeg，回退到下面的 pydub 导出
+                    proc.kill()
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except OSError:
+                        pass
+                if proc.wait() == 0 and written:
+                    return out_path
+    _export_mp3_fast(_append_segments(segs, pause_ms, crossfade_ms), out_path, bitrate)
+    return out_path
+
+
+@functools.lru_cache(maxsize=1)
+def _private_tmp_dir() -> str:
+    """本进程专用的临时目录（mkdtemp 创建，仅当前用户可访问），进程退出时删除。"""
+    path = tempfile.mkdtemp(prefix="kpodcast_audio_")
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+@functools.lru_cache(maxsize=8)
+def _silence_mp3(duration_ms: int, frame_rate: int, channels: int) -> str:
+    """
+    渲染一段静音 mp3 并返回路径，同一参数只渲染一次。
+    文件写在本进程的私有临时目录中，不会复用其他进程或用户预先放置的同名文件。
+    """
+    fd, path = tempfile.mkstemp(prefix=f"silence_{duration_ms}ms_", suffix=".mp3", dir=_private_tmp_dir())
+    os.close(fd)
+    silence = AudioSegment.silent(duration=duration_ms, frame_rate=frame_rate).set_channels(channels)
+    silence.export(path, format="mp3", bitrate="192k")
+    return path
+
+
+def _probe_formats(paths: List[str]) -> set:
+    """用 ffprobe 读取各段的 (编码, 采样率, 声道)；ffprobe 缺失或文件无法读取时返回空集合。"""
+    formats = set()
+    try:
+        for p in paths:
+            info = mediainfo(p)
+            formats.add((info.get("codec_name"), info.get("sample_rate"), info.get("channels")))
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return set()
+    return formats
+
+
+def _concat_list_line(path: str) -> str:
+    # concat demuxer 的列表语法：单引号包裹，内部单引号写作 '\''
+    return "file '{}'\n".format(os.path.abspath(path).replace("'", "'\\''"))
+
+
+def concat_voice_segments_fast(paths: List[str], out_path: str, pause_ms: int = 200) -> str:
+    """
+    用 ffmpeg concat demuxer 直接拼接 mp3 文件（-c copy，不解码、不重新编码），
+    开头与段间插入静音，段与段之间是硬切（不支持交叉淡化）。
+
+    ffmpeg/ffprobe 不可用、输入无法探测、各段采样率/声道不一致或 ffmpeg 执行失败时，
+    回退到 concat_voice_segments 解码拼接后再导出。
+    """
+    ffmpeg = _ensure_ffmpeg()
+    pause_ms = max(0, int(pause_ms))
+    formats = _probe_formats(paths) if ffmpeg and paths else set()
+    if len(formats) == 1:
+        codec, frame_rate, channels = formats.pop()
+        if codec == "mp3" and frame_rate and channels:
+            frame_rate, channels = int(frame_rate), int(channels)
+            lead = _silence_mp3(100, frame_rate, channels)
+            gap = _silence_mp3(pause_ms, frame_rate, channels) if pause_ms else None
+            lines = [_concat_list_line(lead)]
+            for p in paths:
+                lines.append(_concat_list_line(p))
+                if gap:
+                    lines.append(_concat_list_line(gap))
+            with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+                f.writelines(lines)
+                list_file = f.name
+            try:
+                subprocess.run(
+                    [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                     "-i", list_file, "-c", "copy", out_path],
+                    check=True, capture_output=True,
+                )
+                return out_path
+            except (OSError, subprocess.CalledProcessError):
+                pass
+            finally:
+                os.remove(list_file)
+    # 回退：pydub 解码拼接
+    audio_bytes_list = []
+    for p in paths:
+        with open(p, "rb") as f:
+            audio_bytes_list.append(f.read())
+    return concat_voice_segments_to_file(audio_bytes_list, out_path, pause_ms=pause_ms)
+
+
 def export_with_intro(audio_segment: AudioSegment, out_path: str, intro_path: Optional[str] = None) -> str:
     """可选在音频前添加片头，再导出 mp3。"""
     _ensure_ffmpeg()
     if intro_path and os.path.exists(intro_path):
-        intro = AudioSegment.from_file(intro_path).fade_in(100).fade_out(400) - 6
+        intro = _load_intro(intro_path, os.path.getmtime(intro_path), -6.0)
         audio_segment = intro.append(audio_segment, crossfade=200)
-    audio_segment.export(out_path, format="mp3", bitrate="192k")
+    _export_mp3_fast(audio_segment, out_path)
     return out_path
 
 
+def _pad_to_length(seg: AudioSegment, target_ms: int) -> AudioSegment:
+    """在 seg 末尾补零到 target_ms 毫秒；直接在原始字节后补零，不经过 silent() 再 _sync 重采样。"""
+    missing = int(seg.frame_count(ms=target_ms)) - int(seg.frame_count())
+    if missing <= 0:
+        return seg
+    return seg._spawn(seg.raw_data + b"\0" * (missing * seg.frame_width))
+
+
+def _loop_to_length(seg: AudioSegment, target_ms: int) -> AudioSegment:
+    """
+    循环 seg 并截取为 target_ms 毫秒，结果与 (seg * n)[:target_ms] 相同，
+    但直接在原始字节层平铺，只分配一次目标长度的缓冲区。
+    """
+    if len(seg) >= target_ms:
+        return seg[:target_ms]
+    need_bytes = int(seg.frame_count(ms=target_ms)) * seg.frame_width
+    raw = np.frombuffer(seg.raw_data, dtype=np.uint8)
+    return seg._spawn(np.resize(raw, need_bytes).tobytes())
+
+
+def _mix_with_bgm_ffmpeg(ffmpeg: str, voice: AudioSegment, bgm_path: str, out_path: str,
+                        target_length: int, lead_in_ms: int, bgm_volume_db: float,
+                        fade_in_ms: int, fade_out_ms: int, bitrate: str = "192k") -> bool:
+    """
+    用一条 ffmpeg filter_complex 完成背景音乐的循环截取、音量、淡入淡出，
+    并与延后 lead_in_ms 的语音混合后直接编码为 mp3。语音 PCM 经 stdin 传入，
+    中间结果不再回到 Python。成功返回 True；失败时由调用方走 pydub 流程。
+    """
+    pcm_format = _FFMPEG_PCM_FORMATS.get(voice.sample_width)
+    if not pcm_format:
+        return False
+    rate = voice.frame_rate
+    # 单声道语音原样复制到左右声道，与 pydub 的 set_channels 一致
+    # （ffmpeg 自动把单声道转立体声时会衰减 3dB）
+    upmix = "pan=stereo|c0=c0|c1=c0," if voice.channels == 1 else ""
+    graph = (
+        f"[1:a]aloop=loop=-1:size=2000000000,atrim=duration={target_length / 1000:.3f},"
+        f"aresample={rate},volume={bgm_volume_db}dB,"
+        f"afade=t=in:d={fade_in_ms / 1000:.3f},"
+        f"afade=t=out:st={(target_length - fade_out_ms) / 1000:.3f}:d={fade_out_ms / 1000:.3f}[bgm];"
+        f"[0:a]{upmix}adelay=delays={lead_in_ms}:all=1[v];"
+        f"[bgm][v]amix=inputs=2:duration=longest:normalize=0"
+    )
+    try:
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error",
+             "-f", pcm_format, "-ar", str(rate), "-ac", str(voice.channels), "-i", "pipe:0",
+             "-i", bgm_path, "-filter_complex", graph,
+             "-b:a", bitrate, "-f", "mp3", out_path],
+            input=voice.raw_data, check=True, capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return True
+
+
 def mix_intro_voice_with_bgm(intro_voice: AudioSegment, bgm_path: str, out_path: str, 
                               bgm_volume_db: float = -8.0, fade_out_ms: int = 500) -> str:
     """
@@ -106,67 +563,69 @@ def mix_intro_voice_with_bgm(intro_voice: AudioSegment, bgm_path: str, out_path:
     Returns:
         输出文件路径
     """
-    _ensure_ffmpeg()
+    ffmpeg = _ensure_ffmpeg()
     
     if not os.path.exists(bgm_path):
         # 如果没有背景音乐，直接导出语音
-        intro_voice.export(out_path, format="mp3", bitrate="192k")
+        _export_mp3_fast(intro_voice, out_path)
         return out_path
     
-    # 加载背景音乐
-    bgm = AudioSegment.from_file(bgm_path)
+    # 在语音前添加一小段纯背景音乐（让背景音乐先起来）
+    lead_in_ms = 500
+    voice_len = len(intro_voice)
     
     # 计算需要的背景音乐长度（语音长度 + 额外的淡出时间）
-    target_length = len(intro_voice) + fade_out_ms + 200
+    target_length = voice_len + fade_out_ms + 200
     
-    # 如果背景音乐太短，循环播放
-    if len(bgm) < target_length:
-        loops_needed = (target_length // len(bgm)) + 1
-        bgm = bgm * loops_needed
+    # 优先由 ffmpeg 一次完成解码、循环、淡入淡出、混合与编码
+    if ffmpeg and _mix_with_bgm_ffmpeg(ffmpeg, intro_voice, bgm_path, out_path, target_length,
+                                       lead_in_ms=lead_in_ms, bgm_volume_db=bgm_volume_db,
+                                       fade_in_ms=300, fade_out_ms=fade_out_ms):
+        return out_path
     
-    # 截取需要的长度
-    bgm = bgm[:target_length]
+    # 加载背景音乐
+    bgm = _load_segment(bgm_path, os.path.getmtime(bgm_path))
     
-    # 调整背景音乐音量并添加淡入淡出
-    bgm = bgm + bgm_volume_db
-    bgm = bgm.fade_in(300).fade_out(fade_out_ms)
+    # 循环播放（背景音乐太短时）并截取需要的长度
+    bgm = _loop_to_length(bgm, target_length)
     
-    # 在语音前添加一小段纯背景音乐（让背景音乐先起来）
-    lead_in_ms = 500
+    # 调整背景音乐音量并添加淡入淡出
+    bgm = _apply_fades(bgm, 300, fade_out_ms, gain_db=bgm_volume_db)
     
     # 混合：背景音乐从头开始，语音在 lead_in_ms 后开始
-    # 先创建一个与背景音乐等长的静音轨道
-    voice_track = AudioSegment.silent(duration=lead_in_ms) + intro_voice
-    # 确保语音轨道与背景音乐等长
-    if len(voice_track) < len(bgm):
-        voice_track = voice_track + AudioSegment.silent(duration=len(bgm) - len(voice_track))
-    elif len(voice_track) > len(bgm):
-        bgm = bgm + AudioSegment.silent(duration=len(voice_track) - len(bgm))
+    # 语音超出背景音乐时，背景音乐补静音
+    bgm = _pad_to_length(bgm, lead_in_ms + voice_len)
     
-    # 叠加混合
-    mixed = bgm.overlay(voice_track)
+    # 叠加混合：按位置直接叠加，不再为语音拼出与背景音乐等长的静音轨道
+    mixed = bgm.overlay(intro_voice, position=lead_in_ms)
     
     # 导出
-    mixed.export(out_path, format="mp3", bitrate="192k")
+    _export_mp3_fast(mixed, out_path)
     return out_path
 
 
-def _adjust_bgm_length_stretch(bgm: AudioSegment, target_length: int) -> AudioSegment:
+def _adjust_bgm_length_stretch(bgm: AudioSegment, target_length: int,
+                               frame_rate: Optional[int] = None) -> AudioSegment:
     """
     使用变速方式调整BGM长度
     
     Args:
         bgm: 原始BGM音频
         target_length: 目标长度（毫秒）
+        frame_rate: 输出帧率，默认与原始BGM相同；传入后续混音的帧率可省去一次重采样
     
     Returns:
         调整后的BGM音频
     """
-    if len(bgm) == target_length:
-        return bgm
+    frame_rate = frame_rate or bgm.frame_rate
+    # 长度只差几十毫秒时听不出区别，不变速，直接裁剪或在末尾补静音
+    bgm_len = len(bgm)
+    if abs(bgm_len - target_length) < 50:
+        bgm = bgm[:target_length] if bgm_len > target_length else _pad_to_length(bgm, target_length)
+        return bgm if bgm.frame_rate == frame_rate else bgm.set_frame_rate(frame_rate)
     
     # 计算变速比例
-    speed_ratio = len(bgm) / target_length
+    speed_ratio = bgm_len / target_length
     
     # 使用 pydub 的变速功能
     # 变速会同时改变音调，这里通过改变采样率来实现
@@ -176,8 +635,9 @@ def _adjust_bgm_length_stretch(bgm: AudioSegment, target_length: int) -> AudioSe
     # 通过改变帧率来变速
     new_frame_rate = int(bgm.frame_rate * speed_ratio)
     stretched = bgm._spawn(bgm.raw_data, overrides={'frame_rate': new_frame_rate})
-    # 转换回原始帧率以保持兼容性
-    stretched = stretched.set_frame_rate(bgm.frame_rate)
+    # 直接重采样到输出帧率（非标准帧率无法导出 mp3）；变速极小时帧率不变，无需重采样
+    if new_frame_rate != frame_rate:
+        stretched = stretched.set_frame_rate(frame_rate)
     
     return stretched
 
@@ -198,30 +658,47 @@ def _adjust_bgm_length_loop(bgm: AudioSegment, target_length: int, crossfade_ms:
         # BGM足够长，直接裁剪
         return bgm[:target_length]
     
-    # BGM太短，需要循环
-    result = bgm
+    # BGM太短，需要循环：在 numpy 缓冲区里一次性铺开各轮 BGM，
+    # 避免逐轮 append 反复复制整个结果（O(N²)）
+    if bgm.sample_width not in _PCM_DTYPES:
+        bgm = bgm.set_sample_width(2)
+    dtype = _PCM_DTYPES[bgm.sample_width]
+    info = np.iinfo(dtype)
+    samples = np.frombuffer(bgm.raw_data, dtype=dtype).reshape(-1, bgm.channels)
+    n = len(samples)
+    total = int(bgm.frame_count(ms=target_length))
+    xf = int(bgm.frame_count(ms=crossfade_ms))
+    if n == 0:
+        return bgm._spawn(b"\0" * (total * bgm.frame_width))
+    # BGM 不长于交叉淡化时长时直接首尾相接
+    overlap = xf if n > xf else 0
     
-    while len(result) < target_length:
-        # 计算还需要多少长度
-        remaining = target_length - len(result)
-        
-        if remaining <= crossfade_ms:
-            # 剩余长度太短，不足以做交叉淡化，直接用静音填充
-            result = result + AudioSegment.silent(duration=remaining)
+    # 按原先逐轮拼接的规则推算每轮的起点与长度：
+    # 剩余长度不足交叉淡化时长时停止，其后保持静音
+    tiles = [(0, n)]
+    end = n
+    while end < total:
+        remaining = total - end
+        if remaining <= xf:
             break
-        
-        # 取需要的长度（或整个BGM）
-        chunk_length = min(len(bgm), remaining)
-        chunk = bgm[:chunk_length]
-        
-        # 使用交叉淡化拼接
-        if len(result) > crossfade_ms and len(chunk) > crossfade_ms:
-            result = result.append(chunk, crossfade=crossfade_ms)
-        else:
-            result = result + chunk
+        chunk = min(n, remaining)
+        tiles.append((end - overlap, chunk))
+        end += chunk - overlap
+    
+    out = np.zeros((max(end, total), bgm.channels), dtype=np.int32)
+    out[:n] = samples
+    if overlap:
+        fade_in = np.linspace(0.0, 1.0, overlap, endpoint=False)[:, None]
+        head = samples[:overlap] * fade_in
+    for start, chunk in tiles[1:]:
+        if overlap:
+            # 接缝处：上一轮末尾淡出 + 本轮开头淡入
+            out[start:start + overlap] = out[start:start + overlap] * (1.0 - fade_in) + head
+        out[start + overlap:start + chunk] = samples[overlap:chunk]
     
     # 确保精确长度
-    return result[:target_length]
+    mixed = np.clip(out[:total], info.min, info.max).astype(dtype)
+    return bgm._spawn(mixed.tobytes())
 
 
 def export_with_dynamic_intro(main_audio: AudioSegment, intro_voice: Optional[AudioSegment], 
@@ -245,46 +722,44 @@ def export_with_dynamic_intro(main_audio: AudioSegment, intro_voice: Optional[Au
     
     if intro_voice is None and (bgm_path is None or not os.path.exists(bgm_path)):
         # 没有片头，直接导出主音频
-        main_audio.export(out_path, format="mp3", bitrate="192k")
+        _export_mp3_fast(main_audio, out_path)
         return out_path
     
     if intro_voice is None:
         # 只有背景音乐，没有语音（通用风格）
-        bgm = AudioSegment.from_file(bgm_path)
+        bgm = _load_segment(bgm_path, os.path.getmtime(bgm_path))
         # 截取合适长度（比如5秒）
         intro_length = min(5000, len(bgm))
-        intro = bgm[:intro_length].fade_in(100).fade_out(400) - 6
+        intro = _apply_fades(bgm[:intro_length], 100, 400, gain_db=-6)
         final_audio = intro.append(main_audio, crossfade=200)
     else:
         # 有片头语音，需要与背景音乐混合
         if bgm_path and os.path.exists(bgm_path):
             # 混合片头语音和背景音乐
-            bgm = AudioSegment.from_file(bgm_path)
+            bgm = _load_segment(bgm_path, os.path.getmtime(bgm_path))
             
             # 计算需要的背景音乐长度
             lead_in_ms = 500  # 语音前的纯背景音乐时长
             fade_out_ms = 500  # 淡出时长
-            target_length = lead_in_ms + len(intro_voice) + fade_out_ms
+            voice_end = lead_in_ms + len(intro_voice)
+            target_length = voice_end + fade_out_ms
             
             # 根据策略调整BGM长度
             if bgm_strategy == "stretch":
-                bgm = _adjust_bgm_length_stretch(bgm, target_length)
+                # 直接变速到混音时的帧率（与片头语音 _sync 后取两者较高者）
+                bgm = _adjust_bgm_length_stretch(bgm, target_length,
+                                                 frame_rate=max(bgm.frame_rate, intro_voice.frame_rate))
             else:  # "loop" 或其他
                 bgm = _adjust_bgm_length_loop(bgm, target_length, crossfade_ms=loop_crossfade_ms)
             
-            bgm = bgm - 8  # 降低背景音乐音量
-            bgm = bgm.fade_in(300).fade_out(fade_out_ms)
-            
-            # 在语音前添加一小段纯背景音乐
-            voice_track = AudioSegment.silent(duration=lead_in_ms) + intro_voice
+            # 降低背景音乐音量（-8dB）并淡入淡出，一次完成
+            bgm = _apply_fades(bgm, 300, fade_out_ms, gain_db=-8)
             
-            # 确保两轨道等长
-            if len(voice_track) < len(bgm):
-                voice_track = voice_track + AudioSegment.silent(duration=len(bgm) - len(voice_track))
-            elif len(voice_track) > len(bgm):
-                bgm = bgm + AudioSegment.silent(duration=len(voice_track) - len(bgm))
+            # 在语音前添加一小段纯背景音乐；语音超出背景音乐时，背景音乐补静音
+            bgm = _pad_to_length(bgm, voice_end)
             
-            intro = bgm.overlay(voice_track)
+            # 按位置直接叠加，不再为语音拼出与背景音乐等长的静音轨道
+            intro = bgm.overlay(intro_voice, position=lead_in_ms)
         else:
             # 没有背景音乐，只用语音
             intro = intro_voice
@@ -292,6 +767,6 @@ def export_with_dynamic_intro(main_audio: AudioSegment, intro_voice: Optional[Au
         # 拼接片头和主音频
         final_audio = intro.append(main_audio, crossfade=200)
     
-    final_audio.export(out_path, format="mp3", bitrate="192k")
+    _export_mp3_fast(final_audio, out_path)
     return out_path
 
@@ -1,7 +1,27 @@
 import os
+import copy
 import json
+import functools
 import configparser
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+
+def _parse_list(s: str) -> List:
+    """解析 JSON 数组形式的配置（如音色列表），格式不对时返回空列表。"""
+    try:
+        return json.loads(s) if s else []
+    except Exception:
+        return []
+
+
+def _parse_number(cast, sec: str, key: str, raw: str):
+    """把数值配置转为 int/float；解析失败时报出具体配置项，便于启动时定位。"""
+    try:
+        return cast(raw)
+    except ValueError:
+        raise ValueError(
+            f"配置项 [{sec}] {key}（环境变量 PODCAST_{sec.upper()}_{key.upper()}）不是有效的数值: {raw!r}"
+        ) from None
 
 
 def load_ini() -> Dict[str, Any]:
@@ -13,27 +33,41 @@ def load_ini() -> Dict[str, Any]:
       - PODCAST_TENCENT_SECRET_ID
       - PODCAST_COS_BUCKET
       - PODCAST_HUNYUAN_API_MODEL
+    
+    解析结果按 (ini 路径, 修改时间) 缓存，每次返回一份深拷贝（调用方修改其中的列表
+    不会影响缓存）；ini 文件被修改后
+    下次调用自动重新加载。修改了环境变量后（例如测试中）调用
+    load_ini.cache_clear() 重新加载。
     """
-    # 关闭插值功能，避免 ini 值中含有 %（如 URL 编码）时触发格式化错误
-    cfg = configparser.ConfigParser(interpolation=None)
+    ini = _resolve_ini_path()
+    try:
+        mtime_ns = os.stat(ini).st_mtime_ns if ini else None
+    except OSError:
+        ini, mtime_ns = "", None
+    return copy.deepcopy(_load_ini_cached(ini, mtime_ns))
+
+
+def _resolve_ini_path() -> str:
+    """定位要加载的 ini 文件：环境变量 ini 指定的路径优先，否则按项目根目录下的候选文件查找。"""
+    ini = os.getenv("ini", "")
+    if ini and os.path.exists(ini):
+        return ini
     # 以当前文件所在目录为基准，定位到项目根目录
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-    
-    # 尝试加载 config.ini（可选，环境变量可完全替代）
-    ini = os.getenv("ini", "")
+    for name in ("config.ini", "Source_config_podcast.ini", "config_podcast.ini"):
+        config_path = os.path.join(base_dir, name)
+        if os.path.exists(config_path):
+            return config_path
+    return ""
+
+
+@functools.lru_cache(maxsize=1)
+def _load_ini_cached(ini: str, mtime_ns: Optional[int]) -> Dict[str, Any]:
+    # 关闭插值功能，避免 ini 值中含有 %（如 URL 编码）时触发格式化错误
+    cfg = configparser.ConfigParser(interpolation=None)
+    # 尝试加载 config.ini（可选，环境变量可完全替代）；mtime_ns 仅作为缓存键
     ini_loaded = False
-    if not ini or not os.path.exists(ini):
-        possible_configs = [
-            os.path.join(base_dir, "config.ini"),
-            os.path.join(base_dir, "Source_config_podcast.ini"),
-            os.path.join(base_dir, "config_podcast.ini")
-        ]
-        for config_path in possible_configs:
-            if os.path.exists(config_path):
-                ini = config_path
-                break
-    
-    if ini and os.path.exists(ini):
+    if ini:
         cfg.read(ini, encoding="utf-8")
         ini_loaded = True
         print(f"✅ 已加载配置文件: {ini}")
@@ -55,15 +89,11 @@ def load_ini() -> Dict[str, Any]:
     # 简写
     g = get_config
     
-    # 解析音色列表
-    def parse_list(s: str) -> List:
-        try:
-            return json.loads(s) if s else []
-        except Exception:
-            return []
+    def num(cast, sec: str, key: str, default: str):
+        return _parse_number(cast, sec, key, g(sec, key, default))
     
-    voice_numbers = parse_list(g("tencent", "voice_number", "[]"))
-    voice_labels = parse_list(g("tencent", "voice_role", "[]"))
+    voice_numbers = _parse_list(g("tencent", "voice_number", "[]"))
+    voice_labels = _parse_list(g("tencent", "voice_role", "[]"))
     
     return {
         # Bocha 搜索
@@ -99,24 +129,24 @@ def load_ini() -> Dict[str, Any]:
         "hunyuan_api_secret_key": g("tencent", "secret_key", ""),
         "hunyuan_api_region": g("tencent", "region", "ap-beijing"),
         "hunyuan_api_model": g("hunyuan_api", "model", "hunyuan-turbos-latest"),
-        "hunyuan_api_temperature": float(g("hunyuan_api", "temperature", "1")),
-        "hunyuan_api_top_p": float(g("hunyuan_api", "top_p", "0.5")),
-        "hunyuan_api_max_tokens": int(g("hunyuan_api", "max_tokens", "256")),
+        "hunyuan_api_temperature": num(float, "hunyuan_api", "temperature", "1"),
+        "hunyuan_api_top_p": num(float, "hunyuan_api", "top_p", "0.5"),
+        "hunyuan_api_max_tokens": num(int, "hunyuan_api", "max_tokens", "256"),
         
         # TTS 备选音色
         "voice_numbers": voice_numbers,
         "voice_labels": voice_labels,
         
         # 搜索相关
-        "supplementary_search_count": int(g("search", "supplementary_search_count", "4")),
+        "supplementary_search_count": num(int, "search", "supplementary_search_count", "4"),
         
         # Web 抽取
         "url_extract_cookie": g("web_extract", "cookie", ""),
         "url_extract_headers_json": g("web_extract", "headers_json", ""),
         "url_extract_headers": g("web_extract", "headers", ""),
         "web_extract_render_mode": g("web_extract", "render_mode", "off"),
-        "web_extract_render_wait_ms": int(g("web_extract", "render_wait_ms", "1200")),
-        "web_extract_render_timeout_ms": int(g("web_extract", "render_timeout_ms", "15000")),
+        "web_extract_render_wait_ms": num(int, "web_extract", "render_wait_ms", "1200"),
+        "web_extract_render_timeout_ms": num(int, "web_extract", "render_timeout_ms", "15000"),
         
         # COS 云存储
         "cos_enabled": g("cos", "enabled", "false").lower() == "true",
@@ -127,3 +157,4 @@ def load_ini() -> Dict[str, Any]:
     }
 
 
+load_ini.cache_clear = _load_ini_cached.cache_clear
@@ -1,53 +1,134 @@
-HAVE_PLAYWRIGHT = False
-try:
-    from playwright.sync_api import sync_playwright
-    HAVE_PLAYWRIGHT = True
-except Exception:
-    # 未安装时按关闭处理
-    HAVE_PLAYWRIGHT = False
 """
 增强的网页内容提取模块
 使用多种工具级联提取策略，提高网页内容提取的成功率和质量
 支持现代网页和移动端网页
 """
 from typing import Dict, Any, List, Optional, Tuple
+import functools
 import requests
-import trafilatura
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from http.cookiejar import DefaultCookiePolicy
 import logging
 import re
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urljoin
 from html import unescape
 import os
 import json
+import threading
+import queue
+import atexit
+from collections import OrderedDict
+from concurrent.futures import Future
 from utils.config_loader import load_ini
 
-# 备用编码探测
-try:
-    from charset_normalizer import from_bytes as cn_from_bytes
-except Exception:
-    cn_from_bytes = None
-
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("enhanced_url_fetcher")
 
-# 尝试导入可选的依赖库
-HAVE_NEWSPAPER = False
-HAVE_READABILITY = False
+# 可选/较重的依赖库均延迟到首次使用时导入（newspaper 会连带加载 nltk、lxml，
+# playwright 会加载 asyncio/greenlet 等），只读取配置或只用 trafilatura 时无需付出这些开销
 # 移除 requests-html 依赖，因为它需要下载 Chromium 浏览器
 
-try:
-    import newspaper
-    from newspaper import Article
-    HAVE_NEWSPAPER = True
-except ImportError:
-    logger.warning("newspaper3k 库未安装，将不使用该提取方法")
+@functools.lru_cache(maxsize=1)
+def _get_trafilatura():
+    """延迟导入 trafilatura（必需依赖，缺失时抛出 ImportError）。"""
+    import trafilatura
+    return trafilatura
+
+
+@functools.lru_cache(maxsize=1)
+def _get_article_cls():
+    """延迟导入 newspaper3k 的 Article，未安装时返回 None。"""
+    try:
+        from newspaper import Article
+        return Article
+    except ImportError:
+        logger.warning("newspaper3k 库未安装，将不使用该提取方法")
+        return None
+
 
-try:
-    from readability import Document
-    HAVE_READABILITY = True
-except ImportError:
-    logger.warning("readability-lxml 库未安装，将不使用该提取方法")
+@functools.lru_cache(maxsize=1)
+def _get_document_cls():
+    """延迟导入 readability-lxml 的 Document，未安装时返回 None。"""
+    try:
+        from readability import Document
+        return Document
+    except ImportError:
+        logger.warning("readability-lxml 库未安装，将不使用该提取方法")
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _get_sync_playwright():
+    """延迟导入 playwright 的 sync_playwright，未安装时返回 None（按关闭处理）。"""
+    try:
+        from playwright.sync_api import sync_playwright
+        return sync_playwright
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _get_cn_from_bytes():
+    """延迟导入 charset_normalizer（备用编码探测），未安装时返回 None。"""
+    try:
+        from charset_normalizer import from_bytes
+        return from_bytes
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _get_lxml_html():
+    """延迟导入 lxml.html（trafilatura/readability 均依赖它），未安装时返回 None。"""
+    try:
+        from lxml import html as lxml_html
+        return lxml_html
+    except Exception:
+        return None
+
+
+def __getattr__(name: str):
+    # 兼容旧的模块级 HAVE_* 标志：访问时才探测对应依赖
+    if name == "HAVE_PLAYWRIGHT":
+        return _get_sync_playwright() is not None
+    if name == "HAVE_NEWSPAPER":
+        return _get_article_cls() is not None
+    if name == "HAVE_READABILITY":
+        return _get_document_cls() is not None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _build_session() -> requests.Session:
+    """
+    模块级共享会话：复用 TCP/TLS 连接（keep-alive + 连接池），对 5xx 做少量重试。
+    会话的 Cookie 策略拒绝保存任何响应 Cookie，Headers/Cookie 均按次传入，
+    各次抓取之间互不影响，与每次新建 Session 的行为一致。
+    """
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504],
+                  allowed_methods=frozenset(["GET", "HEAD"]), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+_SESSION = _build_session()
+
+# 预编译的正则：每次抓取都会用到，避免重复解析
+# 数字或标点的合并字符类：validate_content 一趟扫描同时判断两者
+_DIGIT_PUNCT_RE = re.compile(r'[\d,.;:!?，。；：！？]')
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_CHARSET_HEADER_RE = re.compile(r'charset=([A-Za-z0-9_-]+)')
+# meta charset 直接在原始字节上匹配，无需先把页面头部解码成字符串
+_META_CHARSET_RE_B = re.compile(rb'<meta[^>]*charset=["\']?([A-Za-z0-9_-]+)', re.IGNORECASE)
+_META_CONTENT_CHARSET_RE_B = re.compile(rb'<meta[^>]*content=["\'][^"\']*charset=([A-Za-z0-9_-]+)["\']', re.IGNORECASE)
+_CANONICAL_RE = re.compile(r'<link[^>]*rel=["\']canonical["\'][^>]*href=["\']([^"\']+)["\']', re.IGNORECASE)
+_OG_URL_RE = re.compile(r'<meta[^>]*property=["\']og:url["\'][^>]*content=["\']([^"\']+)["\']', re.IGNORECASE)
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style|meta|link).*?</\1>|<(script|style|meta|link).*?>', re.DOTALL)
 
 
 def validate_content(text: str, url: str = "") -> Tuple[bool, float]:
@@ -79,23 +160,31 @@ def validate_content(text: str, url: str = "") -> Tuple[bool, float]:
         score += 0.1
     
     # 2. 结构评分 (最高0.3分)
-    paragraphs = text.split('\n\n')
-    if len(paragraphs) > 5:
+    # 只数分隔符而不真正切分段落，省去一次列表分配
+    para_count = text.count('\n\n') + 1
+    if para_count > 5:
         score += 0.3
-    elif len(paragraphs) > 3:
+    elif para_count > 3:
         score += 0.2
-    elif len(paragraphs) > 1:
+    elif para_count > 1:
         score += 0.1
     
     # 3. 内容多样性评分 (最高0.3分)
-    # 检查是否包含数字
-    if re.search(r'\d', text):
+    # 一趟扫描同时检查数字与标点，两者都出现即停止
+    has_digit = has_punct = False
+    for m in _DIGIT_PUNCT_RE.finditer(text):
+        if m.group().isdecimal():
+            has_digit = True
+        else:
+            has_punct = True
+        if has_digit and has_punct:
+            break
+    if has_digit:
         score += 0.1
-    # 检查是否包含标点符号
-    if re.search(r'[,.;:!?，。；：！？]', text):
+    if has_punct:
         score += 0.1
-    # 检查段落平均长度
-    avg_para_len = sum(len(p) for p in paragraphs) / max(len(paragraphs), 1)
+    # 检查段落平均长度：各段长度之和即全文长度减去分隔符
+    avg_para_len = (len(text) - 2 * (para_count - 1)) / para_count
     if avg_para_len > 100:
         score += 0.1
     
@@ -105,6 +194,7 @@ def validate_content(text: str, url: str = "") -> Tuple[bool, float]:
 def extract_with_trafilatura(url: str, html_content: Optional[str] = None) -> str:
     """使用trafilatura提取网页内容"""
     try:
+        trafilatura = _get_trafilatura()
         if html_content:
             text = trafilatura.extract(html_content, include_comments=False, include_tables=True) or ""
         else:
@@ -118,7 +208,8 @@ def extract_with_trafilatura(url: str, html_content: Optional[str] = None) -> st
 
 def extract_with_newspaper(url: str, html_content: Optional[str] = None) -> str:
     """使用newspaper3k提取网页内容"""
-    if not HAVE_NEWSPAPER:
+    Article = _get_article_cls()
+    if Article is None:
         return ""
     
     try:
@@ -136,12 +227,13 @@ def extract_with_newspaper(url: str, html_content: Optional[str] = None) -> str:
 
 def extract_with_readability(url: str, html_content: Optional[str] = None) -> str:
     """使用readability-lxml提取网页内容"""
-    if not HAVE_READABILITY:
+    Document = _get_document_cls()
+    if Document is None:
         return ""
     
     try:
         if not html_content:
-            response = requests.get(
+            response = _SESSION.get(
                 url,
                 timeout=20,
                 headers={
@@ -149,14 +241,19 @@ def extract_with_readability(url: str, html_content: Optional[str] = None) -> st
                     'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
                     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
                 },
+                stream=True,
             )
-            html_content = _smart_decode(response.content, response.headers)
+            try:
+                body = _read_body(response)
+            finally:
+                response.close()
+            html_content = _smart_decode(body, response.headers)
         
         doc = Document(html_content)
-        content = doc.summary()
-        # 移除HTML标签
-        text = re.sub(r'<[^>]+>', ' ', content)
-        text = re.sub(r'\s+', ' ', text).strip()
+        # readability 不对外暴露正文的 lxml 树，只能拿到序列化后的 HTML；
+        # html_partial=True 只输出正文 div，省去 html/body 包装，再由 lxml 解析一次取文本
+        content = doc.summary(html_partial=True)
+        text = _html_to_text(content)
         return text
     except Exception as e:
         logger.warning(f"readability提取失败: {e}")
@@ -166,145 +263,348 @@ def extract_with_readability(url: str, html_content: Optional[str] = None) -> st
 # 移除 requests-html 相关函数
 
 
+# 不是网页正文、提取器无从下手的响应类型（前缀匹配）
+_UNSUPPORTED_CONTENT_TYPES = ('application/pdf', 'application/json', 'image/', 'audio/', 'video/')
+# HTML 短于该字符数时不运行提取器
+_MIN_EXTRACT_HTML_CHARS = 500
+
+
+def _is_unsupported_content_type(content_type: str) -> bool:
+    mime = (content_type or '').split(';', 1)[0].strip().lower()
+    return mime.startswith(_UNSUPPORTED_CONTENT_TYPES)
+
+
+def _extract_best(url: str, html_content: Optional[str]) -> Optional[Tuple[str, str, float]]:
+    """
+    运行提取器，返回有效结果 (提取器名称, 文本, 分数)，均无效时返回 None
+
+    trafilatura 结果有效时直接采用，与原先的级联一样只运行一个提取器；
+    否则运行 newspaper3k 和 readability，取质量分数较高者，同分时取 newspaper3k。
+    在调用线程中顺序执行，不另开线程。
+    """
+    text = extract_with_trafilatura(url, html_content)  # 各提取器自行捕获异常，失败时返回空串
+    valid, score = validate_content(text, url)
+    if valid:
+        return "trafilatura", text, score
+
+    extractors = []
+    if _get_article_cls() is not None:
+        extractors.append(("newspaper3k", extract_with_newspaper))
+    if _get_document_cls() is not None:
+        extractors.append(("readability", extract_with_readability))
+
+    best = None
+    for name, fn in extractors:
+        text = fn(url, html_content)
+        valid, score = validate_content(text, url)
+        if valid and (best is None or score > best[2]):
+            best = (name, text, score)
+    return best
+
+
+def _html_to_text(html_content: str) -> str:
+    """
+    提取 HTML 中的可见文本，标签边界处以空格分隔，连续空白压缩为一个空格
+
+    优先用 lxml 一次解析并遍历文本节点（去掉 script/style/noscript 与注释）；
+    lxml 不可用或解析失败时退回正则剥离。
+    """
+    lxml_html = _get_lxml_html()
+    if lxml_html is not None and html_content and html_content.strip():
+        try:
+            tree = lxml_html.fromstring(html_content)
+            for el in tree.xpath('//script|//style|//noscript|//comment()'):
+                # drop_tree 会把 tail 文本拼到前一段文本上，补一个空格避免粘连
+                if el.tail:
+                    el.tail = ' ' + el.tail
+                el.drop_tree()
+            return ' '.join(' '.join(tree.itertext()).split())
+        except Exception:
+            pass
+    # 移除script, style等标签
+    cleaned_html = _SCRIPT_STYLE_RE.sub('', html_content)
+    # 移除HTML标签，保留文本
+    raw_text = _TAG_RE.sub(' ', cleaned_html)
+    # 清理空白字符
+    return _WS_RE.sub(' ', raw_text).strip()
+
+
+# 单个页面允许下载的最大字节数，超出即放弃（多为归档、文件下载等非正文页面）
+_MAX_BODY_BYTES = 20 * 1024 * 1024
+_BODY_CHUNK_SIZE = 64 * 1024
+
+
+def _read_body(response: requests.Response) -> bytes:
+    """
+    分块读取以 stream=True 发起的响应体，超过 _MAX_BODY_BYTES 时立即中止并抛出 ValueError
+    
+    Content-Length 已声明超限时不读取任何内容；调用方负责 response.close()。
+    """
+    declared = response.headers.get('Content-Length')
+    if declared and declared.isdigit() and int(declared) > _MAX_BODY_BYTES:
+        raise ValueError(f"页面过大（{int(declared)} 字节），超过 {_MAX_BODY_BYTES} 字节上限")
+    buf = bytearray()
+    for chunk in response.iter_content(chunk_size=_BODY_CHUNK_SIZE):
+        buf += chunk
+        if len(buf) > _MAX_BODY_BYTES:
+            raise ValueError(f"页面过大，超过 {_MAX_BODY_BYTES} 字节上限")
+    return bytes(buf)
+
+
 def _smart_decode(content: bytes, headers: Optional[Dict[str, Any]] = None) -> str:
     """尽可能正确地将网页字节解码为字符串，避免乱码。"""
     # 1) Header charset
     charset = None
     if headers:
         ctype = headers.get('Content-Type') or headers.get('content-type') or ''
-        m = re.search(r'charset=([A-Za-z0-9_-]+)', ctype)
+        m = _CHARSET_HEADER_RE.search(ctype)
         if m:
             charset = m.group(1).strip().lower()
     # 2) Try meta charset inside first 4KB to reduce cost
     if not charset:
-        head = content[:4096].decode('latin-1', errors='ignore')
-        m = re.search(r'<meta[^>]*charset=["\']?([A-Za-z0-9_-]+)', head, re.IGNORECASE)
+        m = _META_CHARSET_RE_B.search(content, 0, 4096) or _META_CONTENT_CHARSET_RE_B.search(content, 0, 4096)
         if m:
-            charset = m.group(1).strip().lower()
-        else:
-            m = re.search(r'<meta[^>]*content=["\'][^"\']*charset=([A-Za-z0-9_-]+)["\']', head, re.IGNORECASE)
-            if m:
-                charset = m.group(1).strip().lower()
-    # 3) Charset-normalizer guess
-    candidates = []
+            charset = m.group(1).decode('ascii').lower()
+    # 3) 已知编码：只解码一次
     if charset:
-        candidates.append(charset)
+        try:
+            txt = content.decode(charset, errors='ignore')
+            if txt:
+                return unescape(txt)
+        except LookupError:
+            # 未知的编码名，交给自动探测
+            pass
+    if not content:
+        return ""
+    # 4) 编码未知或无效：charset-normalizer 探测一次，直接使用它解码好的文本
+    cn_from_bytes = _get_cn_from_bytes()
     if cn_from_bytes is not None:
         try:
             best = cn_from_bytes(content).best()
-            if best and best.encoding:
-                candidates.append(best.encoding.lower())
+            if best is not None:
+                txt = str(best)
+                if txt:
+                    return unescape(txt)
         except Exception:
             pass
-    # 4) Fallback list
-    candidates.extend(["utf-8", "gbk", "gb2312"])  # 常见中文网页编码
-    seen = set()
-    for enc in candidates:
-        enc = enc.strip().lower()
-        if enc in seen:
-            continue
-        seen.add(enc)
-        try:
-            txt = content.decode(enc, errors='ignore')
-            # 简单质量判断：避免出现大量替换字符或全是ASCII却看似中文被错解
-            if txt:
-                return unescape(txt)
-        except Exception:
-            continue
     # 最后一搏
-    try:
-        return content.decode('utf-8', errors='ignore')
-    except Exception:
-        return content.decode('latin-1', errors='ignore')
+    return unescape(content.decode('utf-8', errors='ignore'))
 
 
 def _extract_canonical(html: str) -> Optional[str]:
     """从HTML中提取canonical或og:url。"""
-    m = re.search(r'<link[^>]*rel=["\']canonical["\'][^>]*href=["\']([^"\']+)["\']', html, re.IGNORECASE)
+    m = _CANONICAL_RE.search(html)
     if m:
         return m.group(1)
-    m = re.search(r'<meta[^>]*property=["\']og:url["\'][^>]*content=["\']([^"\']+)["\']', html, re.IGNORECASE)
+    m = _OG_URL_RE.search(html)
     if m:
         return m.group(1)
     return None
 
 
-def _render_with_playwright(url: str, headers: Dict[str, str], cookie_str: str, wait_ms: int, timeout_ms: int) -> Optional[str]:
+@functools.lru_cache(maxsize=8)
+def _parse_header_config(raw_direct: str, raw_json: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    解析配置中的额外 Headers，返回 (直接 headers 块, JSON headers)
+    结果按原始字符串缓存，配置不变时不再重复解析；调用方只读不改。
+    """
+    direct_headers = {}
+    extra_headers = {}
+    # 1) 直接 headers 块（优先级最高）
+    try:
+        if raw_direct:
+            # 先尝试按 JSON 解析
+            try:
+                direct_headers = json.loads(raw_direct)
+            except Exception:
+                # 再尝试将 Python 风格字典替换为 JSON 兼容再 loads
+                tmp = raw_direct.strip()
+                # 简单规范化：单引号 -> 双引号
+                if tmp.startswith('{') and tmp.endswith('}'):
+                    tmp2 = tmp.replace("'", '"')
+                    direct_headers = json.loads(tmp2)
+    except Exception:
+        direct_headers = {}
+    # 2) ini/env 中的 JSON headers
+    if raw_json:
+        try:
+            extra_headers = json.loads(raw_json)
+        except Exception:
+            extra_headers = {}
+    return direct_headers, extra_headers
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_cookies(cookie_str: str, domain: str) -> Tuple[Dict[str, str], ...]:
+    """
+    解析形如 "k1=v1; k2=v2" 的 Cookie 字符串，返回 Playwright add_cookies 所需的结构
+    domain: 页面主机名，Cookie 作用于该域及其子域
+    结果按 (cookie_str, domain) 缓存，调用方只读不改。
+    """
+    cookies = []
+    if not cookie_str:
+        return ()
+    cookie_domain = f'.{domain}' if not domain.startswith('.') else domain
+    for part in cookie_str.split(';'):
+        if '=' in part:
+            k, v = part.split('=', 1)
+            cookies.append({
+                'name': k.strip(),
+                'value': v.strip(),
+                'domain': cookie_domain,
+                'path': '/',
+            })
+    return tuple(cookies)
+
+
+class _PlaywrightPool:
+    """
+    常驻的 Playwright 浏览器，避免每个 URL 都重新启动 Chromium。
+
+    Playwright 同步 API 的对象只能在创建它的线程中使用，因此所有渲染任务都投递到
+    一个专用后台线程执行：浏览器在首次使用时启动并一直复用；每次渲染仍新建
+    BrowserContext 并在结束后关闭（创建上下文只需几毫秒），Cookie、localStorage、
+    HTTP 缓存、Service Worker 等状态不会从一个站点带到下一个站点。进程退出时关闭浏览器。
+    """
+    _LAUNCH_ARGS = [
+        '--disable-blink-features=AutomationControlled',
+        '--disable-features=site-per-process',
+    ]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pw = None
+        self._browser = None
+
+    def run(self, fn, *args):
+        """在渲染线程中执行 fn(self, *args) 并等待结果。"""
+        with self._lock:
+            if self._thread is None:
+                self._tasks = queue.Queue()
+                self._thread = threading.Thread(target=self._worker, name="playwright-pool", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+            tasks = self._tasks
+        fut: Future = Future()
+        tasks.put((fut, fn, args))
+        return fut.result()
+
+    def _worker(self) -> None:
+        tasks = self._tasks
+        while True:
+            item = tasks.get()
+            if item is None:
+                break
+            fut, fn, args = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(self, *args))
+            except BaseException as e:
+                fut.set_exception(e)
+        self._close_all()
+
+    def get_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        # 浏览器尚未启动或已崩溃：清理残留后重新启动
+        self._close_all()
+        self._pw = _get_sync_playwright()().start()
+        self._browser = self._pw.chromium.launch(headless=True, args=self._LAUNCH_ARGS)
+        return self._browser
+
+    def _close_all(self) -> None:
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._pw is not None:
+            try:
+                self._pw.stop()
+            except Exception:
+                pass
+            self._pw = None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, tasks = self._thread, self._tasks
+            self._thread = self._tasks = None
+        if thread is not None:
+            tasks.put(None)
+            thread.join(timeout=10)
+
+
+_PLAYWRIGHT_POOL = _PlaywrightPool()
+
+
+def _render_with_playwright(url: str, headers: Dict[str, str], cookies: Tuple[Dict[str, str], ...], wait_ms: int, timeout_ms: int) -> Optional[str]:
     """使用 Playwright 渲染页面，返回渲染后的 HTML。需要已安装 playwright 及浏览器。
     headers: 额外请求头
-    cookie_str: 形如 "k1=v1; k2=v2"
+    cookies: _parse_cookies 解析出的 Cookie 列表
+    浏览器由 _PLAYWRIGHT_POOL 常驻复用（每次渲染使用新的上下文），渲染在其专用线程中串行执行。
     """
-    if not HAVE_PLAYWRIGHT:
+    if _get_sync_playwright() is None:
         logger.warning("未安装 Playwright，跳过渲染模式")
         return None
     try:
-        with sync_playwright() as p:
-            # 启动浏览器，添加反检测参数
-            browser = p.chromium.launch(
-                headless=True,
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-features=site-per-process',
-                ]
-            )
-            
-            # 检测是否为移动端 User-Agent
-            user_agent = headers.get('User-Agent') or headers.get('user-agent') or ""
-            is_mobile = 'Mobile' in user_agent or 'Android' in user_agent
-            
-            # 创建上下文，如果是移动端则模拟移动设备
-            # 清理 headers，移除可能导致问题的字段
-            clean_headers = {}
-            for k, v in headers.items():
-                # 跳过某些可能导致问题的 header
-                if k.lower() not in ['host', 'content-length', 'connection']:
-                    clean_headers[k] = v
-            
-            context_params = {
-                'user_agent': user_agent or None,
-                'extra_http_headers': clean_headers,
-                'accept_downloads': False,
-                'java_script_enabled': True,
-                'ignore_https_errors': True,
-                'locale': "zh-CN",
-            }
-            
-            # 如果是移动端 UA，添加移动端视口
-            if is_mobile:
-                context_params.update({
-                    'viewport': {'width': 360, 'height': 640},
-                    'device_scale_factor': 3,
-                    'is_mobile': True,
-                    'has_touch': True,
-                })
-            
-            context = browser.new_context(**context_params)
-            
-            # 注入 cookie
-            if cookie_str:
-                try:
-                    parsed = urlparse(url)
-                    domain = parsed.hostname or ""
-                    cookies = []
-                    for part in cookie_str.split(';'):
-                        if '=' in part:
-                            k, v = part.split('=', 1)
-                            cookies.append({
-                                'name': k.strip(),
-                                'value': v.strip(),
-                                'domain': f'.{domain}' if not domain.startswith('.') else domain,
-                                'path': '/',
-                            })
-                    if cookies:
-                        context.add_cookies(cookies)
-                        logger.info(f"注入了 {len(cookies)} 个 Cookie")
-                except Exception as ce:
-                    logger.warning(f"渲染模式设置 Cookie 失败: {ce}")
-            
-            # 创建页面
-            page = context.new_page()
+        return _PLAYWRIGHT_POOL.run(_render_in_pool, url, headers, cookies, wait_ms, timeout_ms)
+    except Exception as e:
+        logger.warning(f"Playwright 渲染失败: {e}")
+        return None
+
+
+def _render_in_pool(pool: _PlaywrightPool, url: str, headers: Dict[str, str], cookies: Tuple[Dict[str, str], ...], wait_ms: int, timeout_ms: int) -> str:
+    """在渲染线程中执行的实际渲染逻辑。"""
+    # 检测是否为移动端 User-Agent
+    user_agent = headers.get('User-Agent') or headers.get('user-agent') or ""
+    is_mobile = 'Mobile' in user_agent or 'Android' in user_agent
+
+    # 创建上下文，如果是移动端则模拟移动设备
+    # 清理 headers，移除可能导致问题的字段
+    clean_headers = {}
+    for k, v in headers.items():
+        # 跳过某些可能导致问题的 header
+        if k.lower() not in ['host', 'content-length', 'connection']:
+            clean_headers[k] = v
+
+    context_params = {
+        'user_agent': user_agent or None,
+        'extra_http_headers': clean_headers,
+        'accept_downloads': False,
+        'java_script_enabled': True,
+        'ignore_https_errors': True,
+        'locale': "zh-CN",
+    }
+
+    # 如果是移动端 UA，添加移动端视口
+    if is_mobile:
+        context_params.update({
+            'viewport': {'width': 360, 'height': 640},
+            'device_scale_factor': 3,
+            'is_mobile': True,
+            'has_touch': True,
+        })
+
+    # 每次渲染使用全新的上下文，不继承上一个站点的存储状态
+    context = pool.get_browser().new_context(**context_params)
+    try:
+        # 注入 cookie
+        if cookies:
+            try:
+                context.add_cookies(list(cookies))
+                logger.info(f"注入了 {len(cookies)} 个 Cookie")
+            except Exception as ce:
+                logger.warning(f"渲染模式设置 Cookie 失败: {ce}")
+
+        # 创建页面
+        page = context.new_page()
+        try:
             page.set_default_timeout(timeout_ms)
-            
+
             # 尝试访问页面
             try:
                 # 直接访问 URL（Playwright 会自动处理 URL 编码）
@@ -314,43 +614,119 @@ def _render_with_playwright(url: str, headers: Dict[str, str], cookie_str: str,
                 logger.warning(f"页面访问失败: {goto_error}")
                 # 不要尝试重新编码，直接抛出错误
                 raise goto_error
-            
+
             # 等待页面加载
             if wait_ms and wait_ms > 0:
                 page.wait_for_timeout(wait_ms)
-            
+
             # 额外等待网络静默
             try:
                 page.wait_for_load_state('networkidle', timeout=5000)
             except Exception:
                 pass
-            
+
             # 获取最终 URL 和内容
             final_url = page.url
             html = page.content()
             title = page.title()
-            
-            logger.info(f"页面标题: {title}")
-            logger.info(f"最终 URL: {final_url[:100]}...")
-            logger.info(f"内容长度: {len(html)} 字符")
-            
-            # 检查是否被重定向到验证页面
-            if "验证" in title or "验证" in html[:1000]:
-                logger.warning("检测到验证页面，可能需要更新 Cookie")
-            
+        finally:
+            try:
+                page.close()
+            except Exception:
+                pass
+    finally:
+        try:
             context.close()
-            browser.close()
-            return html
-    except Exception as e:
-        logger.warning(f"Playwright 渲染失败: {e}")
-        return None
+        except Exception:
+            pass
+
+    logger.info(f"页面标题: {title}")
+    logger.info(f"最终 URL: {final_url[:100]}...")
+    logger.info(f"内容长度: {len(html)} 字符")
+
+    # 检查是否被重定向到验证页面
+    if "验证" in title or "验证" in html[:1000]:
+        logger.warning("检测到验证页面，可能需要更新 Cookie")
+
+    return html
+
+
+# 提取结果缓存：(规范化 URL, 请求凭据) -> (ETag, Last-Modified, 结果)，按 LRU 淘汰，
+# 同时限制条目数与缓存文本的总字符数
+_RESULT_CACHE: "OrderedDict[Tuple[str, ...], Tuple[Optional[str], Optional[str], Dict[str, Any]]]" = OrderedDict()
+_RESULT_CACHE_LOCK = threading.Lock()
+_RESULT_CACHE_MAX_ENTRIES = 256
+_RESULT_CACHE_MAX_CHARS = 10 * 1024 * 1024
+_result_cache_chars = 0
+
+# 规范化 URL 时丢弃的跟踪参数（另含所有 utm_* 参数）
+_TRACKING_PARAMS = frozenset({'fbclid', 'gclid', 'yclid', 'mc_cid', 'mc_eid', 'spm'})
+
+
+def _normalize_url(url: str) -> str:
+    """缓存键：协议与主机转小写，去掉路径末尾的 '/' 与常见跟踪参数。"""
+    parsed = urlparse(url.strip())
+    query = '&'.join(
+        part for part in parsed.query.split('&')
+        if part and not (part.split('=', 1)[0].lower().startswith('utm_')
+                         or part.split('=', 1)[0].lower() in _TRACKING_PARAMS)
+    )
+    path = parsed.path.rstrip('/')
+    return parsed._replace(scheme=parsed.scheme.lower(), netloc=parsed.netloc.lower(),
+                           path=path, query=query, fragment='').geturl()
+
+
+def _same_resource(a: str, b: str) -> bool:
+    """两个 URL 规范化后（忽略协议）是否指向同一资源。"""
+    return _normalize_url(a).split('://', 1)[-1] == _normalize_url(b).split('://', 1)[-1]
+
+
+def _request_config(cfg: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    """
+    读取决定请求身份的原始配置：(headers 块, JSON headers, Cookie 字符串, 渲染模式)
+    环境变量优先于 ini；fetch_url_enhanced 也用它作为缓存键的一部分，
+    不同 Cookie/Headers 取得的结果不会互相复用。
+    """
+    raw_direct = cfg.get('url_extract_headers') or ''
+    raw_json = os.getenv('URL_EXTRACT_HEADERS_JSON') or cfg.get('url_extract_headers_json') or ''
+    cookie_str = (os.getenv('URL_EXTRACT_COOKIE') or os.getenv('URL_EXTRACT_COOKIES')
+                  or cfg.get('url_extract_cookie') or '')
+    render_mode = (cfg.get('web_extract_render_mode') or 'off').lower()
+    return raw_direct, raw_json, cookie_str, render_mode
+
+
+def _cache_lookup(key: Tuple[str, ...]) -> Optional[Tuple[Optional[str], Optional[str], Dict[str, Any]]]:
+    with _RESULT_CACHE_LOCK:
+        entry = _RESULT_CACHE.get(key)
+        if entry is not None:
+            _RESULT_CACHE.move_to_end(key)
+        return entry
+
+
+def _cache_store(key: Tuple[str, ...], etag: Optional[str], last_modified: Optional[str], result: Dict[str, Any]) -> None:
+    global _result_cache_chars
+    size = len(result.get("text") or "")
+    if size > _RESULT_CACHE_MAX_CHARS:
+        return
+    with _RESULT_CACHE_LOCK:
+        old = _RESULT_CACHE.pop(key, None)
+        if old is not None:
+            _result_cache_chars -= len(old[2].get("text") or "")
+        _RESULT_CACHE[key] = (etag, last_modified, dict(result))
+        _result_cache_chars += size
+        while len(_RESULT_CACHE) > _RESULT_CACHE_MAX_ENTRIES or _result_cache_chars > _RESULT_CACHE_MAX_CHARS:
+            _, evicted = _RESULT_CACHE.popitem(last=False)
+            _result_cache_chars -= len(evicted[2].get("text") or "")
 
 
 def fetch_url_enhanced(url: str) -> Dict[str, Any]:
     """
     增强版网页内容提取函数
     
-    使用多种工具级联提取策略，提高网页内容提取的成功率和质量
+    使用多种工具级联提取策略，提高网页内容提取的成功率和质量。
+    成功的结果若带有 ETag/Last-Modified，会按 URL 与请求凭据（Cookie/Headers 配置）缓存；
+    以相同凭据再次提取同一页面时发送条件请求，服务器返回 304 即直接复用缓存结果，
+    不再下载与提取。
     
     参数:
         url: 要提取内容的网页URL
@@ -365,6 +741,29 @@ def fetch_url_enhanced(url: str) -> Dict[str, Any]:
             "extractor": 使用的提取器名称
         }
     """
+    try:
+        request_config = _request_config(load_ini())
+    except Exception as e:
+        logger.error(f"URL内容提取过程中发生错误: {e}")
+        return {"success": False, "text": "", "status": 0, "quality_score": 0.0, "extractor": "none", "error": str(e)}
+    key = (_normalize_url(url), *request_config)
+    cached = _cache_lookup(key)
+    cache_info: Dict[str, Any] = {}
+    result = _fetch_url_enhanced(url, cached, cache_info, request_config)
+    if result["success"] and not cache_info.get("hit") and (cache_info.get("etag") or cache_info.get("last_modified")):
+        _cache_store(key, cache_info.get("etag"), cache_info.get("last_modified"), result)
+    return result
+
+
+def _fetch_url_enhanced(url: str, cached: Optional[Tuple[Optional[str], Optional[str], Dict[str, Any]]],
+                        cache_info: Dict[str, Any], request_config: Tuple[str, str, str, str]) -> Dict[str, Any]:
+    """
+    fetch_url_enhanced 的实际实现
+    
+    cached: 该 URL 的缓存条目，存在时 HTTP 请求带上 If-None-Match/If-Modified-Since
+    cache_info: 输出参数，记录响应的 etag/last_modified，以及是否命中 304（hit）
+    request_config: _request_config 读取的 Headers/Cookie/渲染模式配置
+    """
     logger.info(f"开始提取URL内容: {url}")
     
     # 初始化结果
@@ -377,8 +776,7 @@ def fetch_url_enhanced(url: str) -> Dict[str, Any]:
     }
     
     try:
-        # 从环境变量构建会话：可注入 Cookie 与额外 Headers
-        session = requests.Session()
+        # 从环境变量构建本次请求的 Cookie 与额外 Headers（共享会话本身不保存状态）
         base_headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
@@ -386,56 +784,27 @@ def fetch_url_enhanced(url: str) -> Dict[str, Any]:
         }
         # 额外Headers：优先使用 ini 中直接提供的 headers 块（Python/JSON 皆可）
         cfg = load_ini()
-        extra_headers = {}
-        direct_headers = {}
-        # 1) 直接 headers 块（优先级最高）
-        try:
-            raw_direct = cfg.get('url_extract_headers') if isinstance(cfg, dict) else ''
-            if raw_direct:
-                # 先尝试按 JSON 解析
-                try:
-                    direct_headers = json.loads(raw_direct)
-                except Exception:
-                    # 再尝试将 Python 风格字典替换为 JSON 兼容再 loads
-                    tmp = raw_direct.strip()
-                    # 简单规范化：单引号 -> 双引号
-                    if tmp.startswith('{') and tmp.endswith('}'):
-                        tmp2 = tmp.replace("'", '"')
-                        direct_headers = json.loads(tmp2)
-        
-        except Exception:
-            direct_headers = {}
-        env_headers = os.getenv('URL_EXTRACT_HEADERS_JSON')
-        cfg_headers = cfg.get('url_extract_headers_json') if isinstance(cfg, dict) else ""
-        if env_headers or cfg_headers:
-            try:
-                extra_headers = json.loads((env_headers or cfg_headers) or '{}')
-            except Exception:
-                extra_headers = {}
+        raw_direct, raw_json, cookie_str, render_mode = request_config
+        direct_headers, extra_headers = _parse_header_config(raw_direct, raw_json)
         # 合并优先级：base < ini/env JSON < direct headers
         merged_headers = {**base_headers, **extra_headers, **direct_headers}
-        session.headers.update(merged_headers)
-        # Cookie（形如 "k1=v1; k2=v2" ）
-        cookie_str = os.getenv('URL_EXTRACT_COOKIE') or os.getenv('URL_EXTRACT_COOKIES') or (cfg.get('url_extract_cookie') if isinstance(cfg, dict) else "")
-        if cookie_str:
-            for part in cookie_str.split(';'):
-                if '=' in part:
-                    k, v = part.split('=', 1)
-                    session.cookies.set(k.strip(), v.strip())
+        # Cookie（形如 "k1=v1; k2=v2" ）只解析一次：同一份列表既用于 requests，也用于 Playwright 注入
+        cookie_list = _parse_cookies(cookie_str, urlparse(url).hostname or "")
+        cookies = {c['name']: c['value'] for c in cookie_list}
         
         # 检查是否启用 Playwright 渲染
-        render_mode = (cfg.get('web_extract_render_mode') or 'off').lower()
-        logger.info(f"当前渲染配置: mode={render_mode}, HAVE_PLAYWRIGHT={HAVE_PLAYWRIGHT}")
+        logger.info(f"当前渲染配置: mode={render_mode}")
         
         html_content = None
         canonical_url = None
         
         # 如果启用 Playwright，优先使用它（避免被反爬虫拦截）
-        if render_mode == 'playwright' and HAVE_PLAYWRIGHT:
+        if render_mode == 'playwright' and _get_sync_playwright() is not None:
             wait_ms = int(cfg.get('web_extract_render_wait_ms') or 2000)
             timeout_ms = int(cfg.get('web_extract_render_timeout_ms') or 25000)
             logger.info("优先使用 Playwright 渲染模式")
-            rendered_html = _render_with_playwright(url, dict(session.headers), cookie_str, wait_ms, timeout_ms)
+            # 浏览器不会套用 _SESSION 的默认请求头，这里合并成完整的一份
+            rendered_html = _render_with_playwright(url, {**_SESSION.headers, **merged_headers}, cookie_list, wait_ms, timeout_ms)
             if rendered_html:
                 html_content = rendered_html
                 canonical_url = _extract_canonical(html_content)
@@ -445,9 +814,35 @@ def fetch_url_enhanced(url: str) -> Dict[str, Any]:
         # 如果 Playwright 失败或未启用，尝试普通 HTTP 请求
         if not html_content:
             try:
-                response = session.get(url, timeout=20)
-                response.raise_for_status()
-                html_content = _smart_decode(response.content, response.headers)
+                conditional_headers = {}
+                if cached is not None:
+                    etag, last_modified, _ = cached
+                    if etag:
+                        conditional_headers['If-None-Match'] = etag
+                    if last_modified:
+                        conditional_headers['If-Modified-Since'] = last_modified
+                response = _SESSION.get(url, headers={**merged_headers, **conditional_headers}, cookies=cookies,
+                                        timeout=20, stream=True)
+                try:
+                    if response.status_code == 304 and cached is not None:
+                        logger.info("页面未修改 (304)，复用缓存的提取结果")
+                        cache_info["hit"] = True
+                        return dict(cached[2])
+                    response.raise_for_status()
+                    ctype = response.headers.get('Content-Type', '')
+                    if _is_unsupported_content_type(ctype):
+                        # PDF/JSON/图片等不是网页正文，不必下载，也不必跑提取器
+                        logger.warning(f"不支持的内容类型: {ctype}，跳过正文提取")
+                        result["status"] = response.status_code
+                        result["extractor"] = "unsupported_content_type"
+                        result["error"] = f"不支持的内容类型: {ctype}"
+                        return result
+                    body = _read_body(response)
+                finally:
+                    response.close()
+                cache_info["etag"] = response.headers.get('ETag')
+                cache_info["last_modified"] = response.headers.get('Last-Modified')
+                html_content = _smart_decode(body, response.headers)
                 result["status"] = response.status_code
                 canonical_url = _extract_canonical(html_content)
                 logger.info(f"HTTP 请求成功，状态码: {response.status_code}")
@@ -457,67 +852,43 @@ def fetch_url_enhanced(url: str) -> Dict[str, Any]:
                 if not html_content:
                     raise
         
-        # 1. 首先尝试trafilatura（轻量级，速度快）
-        logger.info("尝试使用trafilatura提取")
-        text = extract_with_trafilatura(url, html_content)
-        valid, score = validate_content(text, url)
-        
-        if valid:
-            logger.info(f"trafilatura提取成功，质量分数: {score:.2f}")
+        # 1-3. 在已下载的 HTML 上依次运行提取器：trafilatura 有效即采用，否则取 newspaper3k / readability 中分数较高者；
+        # 页面过小时提取器的开销大于收益，直接走下面的原始 HTML 文本提取
+        best = None
+        if len(html_content) >= _MIN_EXTRACT_HTML_CHARS:
+            best = _extract_best(url, html_content)
+        if best:
+            name, text, score = best
+            logger.info(f"{name}提取成功，质量分数: {score:.2f}")
             result["success"] = True
             result["text"] = text
             result["quality_score"] = score
-            result["extractor"] = "trafilatura"
+            result["extractor"] = name
             return result
         
-        # 2. 尝试newspaper3k
-        if HAVE_NEWSPAPER:
-            logger.info("尝试使用newspaper3k提取")
-            text = extract_with_newspaper(url, html_content)
-            valid, score = validate_content(text, url)
-            
-            if valid:
-                logger.info(f"newspaper3k提取成功，质量分数: {score:.2f}")
-                result["success"] = True
-                result["text"] = text
-                result["quality_score"] = score
-                result["extractor"] = "newspaper3k"
-                return result
-        
-        # 3. 尝试readability
-        if HAVE_READABILITY:
-            logger.info("尝试使用readability提取")
-            text = extract_with_readability(url, html_content)
-            valid, score = validate_content(text, url)
-            
-            if valid:
-                logger.info(f"readability提取成功，质量分数: {score:.2f}")
-                result["success"] = True
-                result["text"] = text
-                result["quality_score"] = score
-                result["extractor"] = "readability"
-                return result
-        
-        # 若存在 canonical，尝试对 canonical 重新获取并再跑三器
-        if canonical_url and canonical_url != url:
+        # 若存在 canonical 且指向另一资源，尝试对 canonical 重新获取并再跑三器；
+        # 仅协议或跟踪参数不同（如去掉 utm_*）时就是刚下载的同一页面，无需再请求
+        if canonical_url:
+            canonical_url = urljoin(url, canonical_url)
+        if canonical_url and not _same_resource(canonical_url, url):
             try:
                 logger.info(f"发现canonical: {canonical_url}，尝试跟随并重新提取")
-                resp2 = session.get(
+                resp2 = _SESSION.get(
                     canonical_url,
                     timeout=20,
-                    headers={ 'Referer': url, **session.headers },
+                    # 会话默认头由 _SESSION 自动合并，只需传入本次的 Headers
+                    headers={ 'Referer': url, **merged_headers },
+                    cookies=cookies,
+                    stream=True,
                 )
-                html2 = _smart_decode(resp2.content, resp2.headers)
-                # trafilatura
-                text = extract_with_trafilatura(canonical_url, html2)
-                valid, score = validate_content(text, canonical_url)
-                if not valid and HAVE_NEWSPAPER:
-                    text = extract_with_newspaper(canonical_url, html2)
-                    valid, score = validate_content(text, canonical_url)
-                if not valid and HAVE_READABILITY:
-                    text = extract_with_readability(canonical_url, html2)
-                    valid, score = validate_content(text, canonical_url)
-                if valid:
+                try:
+                    body2 = _read_body(resp2)
+                finally:
+                    resp2.close()
+                html2 = _smart_decode(body2, resp2.headers)
+                best = _extract_best(canonical_url, html2)
+                if best:
+                    _, text, score = best
                     result["success"] = True
                     result["text"] = text
                     result["quality_score"] = score
@@ -528,12 +899,7 @@ def fetch_url_enhanced(url: str) -> Dict[str, Any]:
         
         # 5. 如果所有方法都失败，但我们有HTML内容，尝试直接提取可见文本
         logger.info("所有提取方法失败，尝试直接从HTML提取文本")
-        # 移除script, style等标签
-        cleaned_html = re.sub(r'<(script|style|meta|link).*?</\1>|<(script|style|meta|link).*?>', '', html_content, flags=re.DOTALL)
-        # 移除HTML标签，保留文本
-        raw_text = re.sub(r'<[^>]+>', ' ', cleaned_html)
-        # 清理空白字符
-        raw_text = re.sub(r'\s+', ' ', raw_text).strip()
+        raw_text = _html_to_text(html_content)
         
         valid, score = validate_content(raw_text, url)
         if valid:
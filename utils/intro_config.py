@@ -3,6 +3,7 @@
 片头文案配置
 每个风格对应一套片头文案，双人模式时 A/B 交替朗读
 """
+import functools
 
 # 风格分类映射
 INTRO_STYLE_MAP = {
@@ -44,6 +45,9 @@ INTRO_STYLES = [
 # 自定义片头文案最大字数限制
 CUSTOM_INTRO_MAX_CHARS = 200
 
+# 统计字数时不计入的空白字符（含 Windows 换行中的 \r 与制表符）
+_WS_TRANS = str.maketrans('', '', ' \n\r\t')
+
 # 背景音乐文件映射
 INTRO_BGM_FILES = {
     "tech": "bgm_tech.mp3",
@@ -201,16 +205,26 @@ def get_intro_script(style: str, host_mode: str = "dual", custom_script: str = N
             # 双人模式：返回行列表，奇数行给A，偶数行给B
             return lines
     
+    return list(_cached_script(style, host_mode))
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_script(style: str, host_mode: str) -> tuple:
+    """
+    内置风格的片头文案，只取决于 (style, host_mode)，按组合缓存
+    
+    返回元组，get_intro_script 每次复制成新列表，调用方修改不会影响缓存与 INTRO_SCRIPTS
+    """
     scripts = INTRO_SCRIPTS.get(style, [])
     if not scripts:
-        return []
+        return ()
     
     if host_mode == "single":
         # 单人模式：合并所有文案为一段
-        return [" ".join(scripts)]
+        return (" ".join(scripts),)
     else:
-        # 双人模式：返回原始列表，A/B交替
-        return scripts
+        # 双人模式：原始列表，A/B交替
+        return tuple(scripts)
 
 
 def parse_custom_intro_script(custom_script: str, max_chars: int = None) -> tuple:
@@ -231,7 +245,7 @@ def parse_custom_intro_script(custom_script: str, max_chars: int = None) -> tupl
         return False, "请输入片头文案"
     
     # 检查字数
-    total_chars = len(custom_script.replace('\n', '').replace(' ', ''))
+    total_chars = len(custom_script.translate(_WS_TRANS))
     if total_chars > max_chars:
         return False, f"片头文案超过{max_chars}字限制（当前{total_chars}字）"
     
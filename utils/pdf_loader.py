@@ -3,15 +3,128 @@ PDF文档加载工具
 支持从PDF文件中提取文本内容
 """
 from typing import Dict, Any, List, Optional
+import io
 import os
 import logging
 import tempfile
-import PyPDF2
-import pdfplumber
+import shutil
+import stat
+import hashlib
+import threading
+from collections import OrderedDict
+import mmap
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+class _PrintableTable(dict):
+    """
+    str.translate 用的映射表：删除既不可打印也不是空白的字符（控制符、零宽字符等），
+    与 char.isprintable() or char.isspace() 的判断一致
+    
+    按需填充：首次遇到某个码位时判断一次并缓存，之后的查找都在 C 层完成
+    """
+    def __missing__(self, cp: int):
+        ch = chr(cp)
+        value = cp if (ch.isprintable() or ch.isspace()) else None
+        self[cp] = value
+        return value
+
+_PRINTABLE_TABLE = _PrintableTable()
+
+# ASCII 范围内既不可打印也不是空白的字节（\x1c-\x1f 属于 isspace，需保留）
+_ASCII_UNPRINTABLE = bytes(range(0x00, 0x09)) + bytes(range(0x0e, 0x1c)) + b'\x7f'
+
+def _filter_printable(text: str) -> str:
+    """
+    删除不可打印字符，结果与 _PRINTABLE_TABLE 一致
+    
+    str.translate 对纯 ASCII 文本很快，但中文等非 ASCII 文本要逐字符查表；
+    这类文本先编码为 UTF-8 用 bytes.translate 删掉 ASCII 控制符（多字节序列不含 ASCII 字节，
+    surrogatepass 保证孤立代理项原样往返），剩余字符去掉空白后全部可打印时直接返回，否则再查表
+    """
+    if text.isascii():
+        return text.translate(_PRINTABLE_TABLE)
+    text = (text.encode('utf-8', 'surrogatepass')
+            .translate(None, _ASCII_UNPRINTABLE)
+            .decode('utf-8', 'surrogatepass'))
+    if ''.join(text.split()).isprintable():
+        return text
+    return text.translate(_PRINTABLE_TABLE)
+
+def _clean_text(page_texts: List[str]) -> str:
+    """以空行连接各页文本，整体清理一次不可打印字符并去掉首尾空白"""
+    return _filter_printable("\n\n".join(page_texts)).strip()
+
+def extract_text_from_pdf_pymupdf(file_path: str) -> str:
+    """
+    使用PyMuPDF（MuPDF C 引擎）从PDF文件中提取文本；未安装 PyMuPDF 时返回空字符串
+    
+    参数:
+        file_path: PDF文件路径
+        
+    返回:
+        提取的文本内容
+    """
+    texts = _pymupdf_page_texts(file_path)
+    return _clean_text(texts) if texts else ""
+
+def _pymupdf_page_texts(file_path: str) -> Optional[List[str]]:
+    """用 PyMuPDF 逐页提取原始文本；未安装或提取失败时返回 None"""
+    try:
+        import fitz
+    except ImportError:
+        return None
+    try:
+        with fitz.open(file_path) as doc:
+            return [page.get_text("text") for page in doc]
+    except Exception as e:
+        logger.error(f"PyMuPDF提取文本失败: {e}")
+        return None
+
+def extract_text_from_pdf_pdfium(file_path: str) -> str:
+    """
+    使用pypdfium2（PDFium C++ 引擎，pdfplumber 的依赖）从PDF文件中提取文本
+    
+    参数:
+        file_path: PDF文件路径
+        
+    返回:
+        提取的文本内容
+    """
+    texts = _pdfium_page_texts(file_path)
+    return _clean_text(texts) if texts else ""
+
+def _pdfium_page_texts(file_path: str) -> Optional[List[str]]:
+    """用 pypdfium2 逐页提取原始文本；未安装或提取失败时返回 None"""
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return None
+    try:
+        texts = []
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            for i in range(len(pdf)):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                try:
+                    # PDFium 以 \r\n 换行，统一为 \n 与其他提取器保持一致
+                    page_text = textpage.get_text_bounded().replace("\r\n", "\n")
+                finally:
+                    textpage.close()
+                    page.close()
+                texts.append(page_text)
+        finally:
+            pdf.close()
+        return texts
+    except Exception as e:
+        logger.error(f"pypdfium2提取文本失败: {e}")
+        return None
+
 def extract_text_from_pdf_pypdf2(file_path: str) -> str:
     """
     使用PyPDF2从文件中提取文本
@@ -23,78 +136,214 @@ def extract_text_from_pdf_pypdf2(file_path: str) -> str:
         提取的文本内容
     """
     try:
-        text = ""
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text() or ""
-                # 处理编码问题
-                try:
-                    # 尝试不同的编码方式
-                    if not page_text.strip() and hasattr(page, "_extract_text"):
-                        # 尝试直接访问底层方法
-                        page_text = page._extract_text() or ""
-                except Exception as inner_e:
-                    logger.warning(f"PyPDF2页面文本提取内部错误: {inner_e}")
-                
-                # 清理文本中的不可打印字符
-                page_text = ''.join(char for char in page_text if char.isprintable() or char.isspace())
-                text += page_text + "\n\n"
-        return text.strip()
+        # 按需导入：只保存或合并文件的调用方不必加载 PDF 解析库
+        import PyPDF2
+        # 内存映射整个文件，PyPDF2 解析交叉引用表时的大量 seek/read 不再逐次走系统调用
+        with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # 显式关闭严格校验，不依赖各版本的默认值；略有损坏的文件也尽量提取
+            pdf_reader = PyPDF2.PdfReader(mm, strict=False)
+            texts = [page.extract_text() or "" for page in pdf_reader.pages]
+        return _clean_text(texts)
     except Exception as e:
         logger.error(f"PyPDF2提取文本失败: {e}")
         return ""
 
-def extract_text_from_pdf_pdfplumber(file_path: str) -> str:
+# 快速提取平均每页字符数达到该值的一半即视为文本充足，跳过 pdfplumber
+MIN_CHARS_PER_PAGE = 100
+
+# 页数达到该值的 PDF 才按页段分给多个进程提取
+_PARALLEL_MIN_PAGES = 16
+
+# pdfplumber 分段提取共用的进程池：首次需要时创建并一直复用；
+# 使用 spawn 启动子进程，避免在已有多个线程的服务进程中 fork
+_PAGE_POOL: Optional[ProcessPoolExecutor] = None
+_PAGE_POOL_LOCK = threading.Lock()
+
+# 表格兜底按文字对齐切分单元格，不做代价高的线段检测与聚类
+_TABLE_SETTINGS = {
+    "vertical_strategy": "text",
+    "horizontal_strategy": "text",
+    "snap_tolerance": 3,
+}
+
+def _extract_page_text(page) -> Optional[str]:
+    """提取 pdfplumber 单页文本，失败时返回 None（该页跳过）"""
+    try:
+        # 尝试提取文本
+        page_text = page.extract_text() or ""
+        
+        # 如果提取的文本为空，尝试其他方法；单元格文字同样来自 page.chars，没有字符的页面跳过
+        if not page_text.strip() and page.chars:
+            # 尝试提取表格数据
+            tables = page.extract_tables(table_settings=_TABLE_SETTINGS)
+            if tables:
+                rows = [page_text]
+                for table in tables:
+                    for row in table:
+                        rows.append(" ".join([cell or "" for cell in row if cell]) + "\n")
+                page_text = "".join(rows)
+        return page_text
+    except Exception as page_e:
+        logger.warning("pdfplumber页面文本提取错误: %s", page_e)
+        return None
+    finally:
+        # 释放该页缓存的版面对象，长文档逐页处理时内存不再累积
+        try:
+            page.close()
+        except Exception:
+            pass
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """在子进程中提取第 start..stop-1 页（从 0 开始）的文本"""
+    import pdfplumber
+    with pdfplumber.open(file_path, pages=list(range(start + 1, stop + 1))) as pdf:
+        return [t for t in map(_extract_page_text, pdf.pages) if t is not None]
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _PAGE_POOL
+    with _PAGE_POOL_LOCK:
+        if _PAGE_POOL is None:
+            _PAGE_POOL = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _PAGE_POOL
+
+def _reset_page_pool(pool: ProcessPoolExecutor) -> None:
+    """进程池损坏后丢弃，下次需要时重新创建"""
+    global _PAGE_POOL
+    with _PAGE_POOL_LOCK:
+        if _PAGE_POOL is pool:
+            _PAGE_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def extract_text_from_pdf_pdfplumber(file_path: str, parallel: bool = False) -> str:
     """
     使用pdfplumber从PDF文件中提取文本
     
+    parallel=True 时，长文档（不少于 _PARALLEL_MIN_PAGES 页）按连续页段分给共用进程池并行提取，
+    pdfminer 为纯 Python 实现，线程无法并行。只有快速提取器失败时才值得这样做，
+    因此仅由 extract_text_from_pdf 的级联开启。
+    
     参数:
         file_path: PDF文件路径
+        parallel: 是否允许把长文档分给多个进程提取
         
     返回:
         提取的文本内容
     """
     try:
-        text = ""
+        # pdfplumber 会连带加载 pdfminer、Pillow 等，推迟到首次提取时导入
+        import pdfplumber
         with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
+            num_pages = len(pdf.pages)
+            workers = min(os.cpu_count() or 1, num_pages // (_PARALLEL_MIN_PAGES // 2) or 1)
+            if parallel and num_pages >= _PARALLEL_MIN_PAGES and workers > 1:
+                bounds = [num_pages * i // workers for i in range(workers + 1)]
+                pool = None
                 try:
-                    # 尝试提取文本
-                    page_text = page.extract_text() or ""
-                    
-                    # 如果提取的文本为空，尝试其他方法
-                    if not page_text.strip():
-                        # 尝试提取表格数据
-                        tables = page.extract_tables()
-                        if tables:
-                            for table in tables:
-                                for row in table:
-                                    page_text += " ".join([cell or "" for cell in row if cell]) + "\n"
-                    
-                    # 清理文本中的不可打印字符
-                    page_text = ''.join(char for char in page_text if char.isprintable() or char.isspace())
-                    text += page_text + "\n\n"
-                except Exception as page_e:
-                    logger.warning(f"pdfplumber页面文本提取错误: {page_e}")
-        return text.strip()
+                    pool = _get_page_pool()
+                    chunks = list(pool.map(_extract_page_range, [file_path] * workers, bounds[:-1], bounds[1:]))
+                    return _clean_text([t for chunk in chunks for t in chunk])
+                except (OSError, BrokenProcessPool) as e:
+                    logger.warning(f"进程池不可用，改为逐页提取: {e}")
+                    if pool is not None:
+                        _reset_page_pool(pool)
+            texts = [t for t in map(_extract_page_text, pdf.pages) if t is not None]
+        return _clean_text(texts)
     except Exception as e:
         logger.error(f"pdfplumber提取文本失败: {e}")
         return ""
 
+# 提取结果的进程内缓存：文件内容哈希 -> 文本，同一份 PDF 再次上传时无需重新解析；
+# 只存在于内存中（不落到共享临时目录，其他用户无法读取或伪造），按 LRU 淘汰，
+# 同时限制条目数与缓存文本的总字符数
+_PDF_TEXT_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_PDF_TEXT_CACHE_LOCK = threading.Lock()
+_PDF_TEXT_CACHE_MAX_ENTRIES = 64
+_PDF_TEXT_CACHE_MAX_CHARS = 20 * 1024 * 1024
+_pdf_text_cache_chars = 0
+
+def _file_digest(file_path: str) -> str:
+    """计算文件内容的 blake2b 摘要（16 字节，十六进制）"""
+    with open(file_path, 'rb') as f:
+        if hasattr(hashlib, "file_digest"):
+            h = hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16))
+        else:
+            h = hashlib.blake2b(digest_size=16)
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+def _read_cached_text(digest: str) -> Optional[str]:
+    with _PDF_TEXT_CACHE_LOCK:
+        text = _PDF_TEXT_CACHE.get(digest)
+        if text is not None:
+            _PDF_TEXT_CACHE.move_to_end(digest)
+        return text
+
+def _write_cached_text(digest: str, text: str) -> None:
+    global _pdf_text_cache_chars
+    if len(text) > _PDF_TEXT_CACHE_MAX_CHARS:
+        return
+    with _PDF_TEXT_CACHE_LOCK:
+        old = _PDF_TEXT_CACHE.pop(digest, None)
+        if old is not None:
+            _pdf_text_cache_chars -= len(old)
+        _PDF_TEXT_CACHE[digest] = text
+        _pdf_text_cache_chars += len(text)
+        while len(_PDF_TEXT_CACHE) > _PDF_TEXT_CACHE_MAX_ENTRIES or _pdf_text_cache_chars > _PDF_TEXT_CACHE_MAX_CHARS:
+            _, evicted = _PDF_TEXT_CACHE.popitem(last=False)
+            _pdf_text_cache_chars -= len(evicted)
+
 def extract_text_from_pdf(file_path: str) -> str:
     """
     从PDF文件中提取文本，尝试多种方法
     
+    结果按文件内容哈希缓存在内存中，内容相同的文件直接返回缓存的文本
+    
     参数:
         file_path: PDF文件路径
         
     返回:
         提取的文本内容
     """
-    # 首先尝试使用pdfplumber
-    text = extract_text_from_pdf_pdfplumber(file_path)
+    try:
+        digest = _file_digest(file_path)
+    except FileNotFoundError:
+        # 文件不存在时各提取器也无法打开，不必逐个尝试
+        logger.warning(f"文件不存在: {file_path}")
+        return ""
+    except OSError as e:
+        logger.warning(f"无法读取PDF文件计算哈希: {e}")
+        digest = None
+    if digest:
+        cached = _read_cached_text(digest)
+        if cached is not None:
+            return cached
+    
+    text = _extract_text_uncached(file_path)
+    # 空结果不缓存，避免偶发失败被固化
+    if text and digest:
+        _write_cached_text(digest, text)
+    return text
+
+def _extract_text_uncached(file_path: str) -> str:
+    """先用快速提取器，文本量不足时再依次尝试 pdfplumber 和 PyPDF2"""
+    # 首先尝试 C 引擎的快速提取：PyMuPDF（如已安装），其次 pypdfium2
+    texts = _pymupdf_page_texts(file_path)
+    text = _clean_text(texts) if texts else ""
+    if not text:
+        texts = _pdfium_page_texts(file_path)
+        text = _clean_text(texts) if texts else ""
+    
+    # 平均每页文本足够时直接返回，不再做 pdfplumber 的版面分析
+    if texts and len(text) >= MIN_CHARS_PER_PAGE * len(texts) * 0.5:
+        return text
+    
+    # 快速提取失败或文本过少（如部分页面只有表格）时，使用 pdfplumber（版面分析更细，但慢得多）；
+    # pdfplumber 也没有结果时保留快速提取的文本
+    text = extract_text_from_pdf_pdfplumber(file_path, parallel=True) or text
     
     # 如果pdfplumber提取失败或提取内容为空，尝试使用PyPDF2
     if not text:
@@ -102,41 +351,46 @@ def extract_text_from_pdf(file_path: str) -> str:
     
     return text
 
+def _extract_one(file_path: str) -> Optional[Dict[str, str]]:
+    """
+    处理单个PDF文件，返回 {"title", "content"}；文件无效或未提取到文本时返回 None
+    
+    自行捕获所有异常，避免单个损坏的 PDF 影响其他文件
+    """
+    try:
+        # 文件是否存在由 extract_text_from_pdf 打开文件时判断，这里不再单独 stat
+        if file_path[-4:].lower() != '.pdf':
+            logger.warning(f"不是PDF文件: {file_path}")
+            return None
+            
+        text = extract_text_from_pdf(file_path)
+        if text:
+            file_name = os.path.basename(file_path)
+            return {
+                "title": file_name,
+                "content": text
+            }
+        logger.warning(f"无法从文件中提取文本: {file_path}")
+    except Exception as e:
+        logger.error(f"处理PDF文件时出错: {file_path}, 错误: {e}")
+    return None
+
 def process_pdf_files(file_paths: List[str]) -> List[Dict[str, str]]:
     """
     处理多个PDF文件，提取文本内容并返回文件名和内容的列表
     
+    在当前进程中逐个提取，结果顺序与输入一致。大多数文件由 C 引擎的快速提取器在毫秒级完成，
+    为每次请求创建进程池的开销反而更大；而且调用方是已有线程池的 Web 服务进程，
+    在其中 fork 子进程可能死锁。
+    
     参数:
         file_paths: PDF文件路径列表
         
     返回:
         包含每个文件名和内容的字典列表
     """
-    pdf_documents = []
-    
-    for file_path in file_paths:
-        try:
-            if not os.path.exists(file_path):
-                logger.warning(f"文件不存在: {file_path}")
-                continue
-                
-            if not file_path.lower().endswith('.pdf'):
-                logger.warning(f"不是PDF文件: {file_path}")
-                continue
-                
-            text = extract_text_from_pdf(file_path)
-            if text:
-                file_name = os.path.basename(file_path)
-                pdf_documents.append({
-                    "title": file_name,
-                    "content": text
-                })
-            else:
-                logger.warning(f"无法从文件中提取文本: {file_path}")
-        except Exception as e:
-            logger.error(f"处理PDF文件时出错: {file_path}, 错误: {e}")
-    
-    return pdf_documents
+    results = [_extract_one(file_path) for file_path in file_paths]
+    return [doc for doc in results if doc is not None]
 
 def merge_pdf_contents(pdf_documents: List[Dict[str, str]]) -> str:
     """
@@ -148,17 +402,101 @@ def merge_pdf_contents(pdf_documents: List[Dict[str, str]]) -> str:
     返回:
         合并后的文本内容
     """
-    all_text = []
+    # 逐段写入 StringIO，不为每个文档另外拼出一份“标题+正文”的副本
+    buf = io.StringIO()
+    for i, doc in enumerate(pdf_documents):
+        if i:
+            buf.write("\n\n")
+        buf.write("--- 文件: ")
+        buf.write(doc['title'])
+        buf.write(" ---\n")
+        buf.write(doc['content'])
+        buf.write("\n")
+    
+    return buf.getvalue()
+
+# 保存上传文件时的读写缓冲区大小（1 MiB）
+_COPY_BUFSIZE = 1 << 20
+
+def _write_bytes(f, data: bytes) -> None:
+    """按 _COPY_BUFSIZE 分片写入，memoryview 切片不复制数据"""
+    with memoryview(data) as mv:
+        for start in range(0, len(mv), _COPY_BUFSIZE):
+            f.write(mv[start:start + _COPY_BUFSIZE])
+
+# save_uploaded_files 创建、尚未被 cleanup_uploaded_files 删除的目录
+_UPLOAD_DIRS = set()
+_UPLOAD_DIRS_LOCK = threading.Lock()
+
+def _new_upload_dir() -> str:
+    """为一次 save_uploaded_files 调用新建目录（mkdtemp，仅当前用户可访问）并登记"""
+    upload_dir = tempfile.mkdtemp(prefix="upload_")
+    with _UPLOAD_DIRS_LOCK:
+        _UPLOAD_DIRS.add(upload_dir)
+    return upload_dir
+
+def _upload_path(upload_dir: str, file_name: str) -> str:
+    """
+    为带原始文件名的上传生成保存路径
+    
+    保留原文件名作为文档标题；同一次调用中已有同名文件时放进 upload_dir 下新建的子目录，
+    不会互相覆盖，也不会跟随临时目录中预先放置的符号链接
+    """
+    file_name = os.path.basename(file_name)
+    path = os.path.join(upload_dir, file_name)
+    if os.path.lexists(path):
+        path = os.path.join(tempfile.mkdtemp(dir=upload_dir), file_name)
+    return path
+
+def cleanup_uploaded_files(file_paths: List[str]) -> None:
+    """
+    删除 save_uploaded_files 为这些路径创建的临时目录（连同其中的文件）
     
-    for doc in pdf_documents:
-        all_text.append(f"--- 文件: {doc['title']} ---\n{doc['content']}\n")
+    调用方原样传入的已有文件路径不在这些目录中，不会被删除
+    """
+    with _UPLOAD_DIRS_LOCK:
+        dirs = {d for d in _UPLOAD_DIRS if any(p.startswith(d + os.sep) for p in file_paths)}
+        _UPLOAD_DIRS.difference_update(dirs)
+    for d in dirs:
+        shutil.rmtree(d, ignore_errors=True)
+
+def _is_on_disk_at_start(file_obj) -> bool:
+    """
+    判断文件对象是否对应磁盘上的普通文件且读位置在开头，可以直接按路径复制
     
-    return "\n\n".join(all_text)
+    name 是相对路径（之后 chdir 过）或路径已被替换时，按路径打开的不是对象已打开的文件，
+    因此要求 name 当前指向的文件与 fileno() 是同一个文件
+    """
+    name = getattr(file_obj, 'name', None)
+    if not isinstance(name, str) or not hasattr(file_obj, 'fileno'):
+        return False
+    try:
+        opened = os.fstat(file_obj.fileno())
+        return (file_obj.tell() == 0 and stat.S_ISREG(opened.st_mode)
+                and os.path.samestat(opened, os.stat(name)))
+    except (OSError, ValueError, io.UnsupportedOperation):
+        return False
+
+def _copy_file_object(file_obj, file_path: str) -> None:
+    """
+    把上传的文件对象保存到 file_path
+    
+    Gradio 等框架的上传文件通常已落盘，此时用 shutil.copyfile 按路径复制（Linux 下走 sendfile，
+    数据不经过 Python 进程）；否则按 _COPY_BUFSIZE 分块读写
+    """
+    if _is_on_disk_at_start(file_obj):
+        shutil.copyfile(file_obj.name, file_path)
+        return
+    with open(file_path, 'wb', buffering=_COPY_BUFSIZE) as f:
+        shutil.copyfileobj(file_obj, f, length=_COPY_BUFSIZE)
 
 def save_uploaded_files(uploaded_files: List[Any]) -> List[str]:
     """
     保存上传的文件到临时目录
     
+    同一次调用保存的文件都放在一个新建的私有目录中；处理完后调用
+    cleanup_uploaded_files(返回的路径列表) 删除该目录
+    
     参数:
         uploaded_files: 上传的文件列表
         
@@ -168,7 +506,7 @@ def save_uploaded_files(uploaded_files: List[Any]) -> List[str]:
     file_paths = []
     
     # 输出调试信息
-    logger.info(f"Received uploaded_files: {type(uploaded_files)}")
+    logger.debug("Received uploaded_files: %s", type(uploaded_files))
     
     # 如果没有上传文件，直接返回空列表
     if uploaded_files is None:
@@ -178,90 +516,90 @@ def save_uploaded_files(uploaded_files: List[Any]) -> List[str]:
     # 确保上传文件是列表
     if not isinstance(uploaded_files, list):
         uploaded_files = [uploaded_files]
-        logger.info("Converted single file to list")
+        logger.debug("Converted single file to list")
+    
+    logger.info("Processing %d files", len(uploaded_files))
     
-    logger.info(f"Processing {len(uploaded_files)} files")
+    # 字符串路径原样返回，其余上传都要写入本次调用的目录
+    upload_dir = None
+    if any(not isinstance(f, str) for f in uploaded_files):
+        upload_dir = _new_upload_dir()
     
     for i, uploaded_file in enumerate(uploaded_files):
         try:
-            logger.info(f"Processing file {i}: {type(uploaded_file)}")
+            logger.debug("Processing file %s: %s", i, type(uploaded_file))
             
             # 处理bytes类型的数据
             if isinstance(uploaded_file, bytes):
-                # 生成一个随机文件名
-                import uuid
-                temp_dir = tempfile.gettempdir()
-                file_name = f"uploaded_{uuid.uuid4().hex}.pdf"
-                file_path = os.path.join(temp_dir, file_name)
+                # mkstemp 以 O_EXCL 创建随机命名的文件，不会与其他上传冲突
+                fd, file_path = tempfile.mkstemp(prefix="uploaded_", suffix=".pdf", dir=upload_dir)
                 
                 # 保存文件内容
-                with open(file_path, 'wb') as f:
-                    f.write(uploaded_file)
+                with os.fdopen(fd, 'wb', buffering=_COPY_BUFSIZE) as f:
+                    _write_bytes(f, uploaded_file)
                     
                 file_paths.append(file_path)
-                logger.info(f"Saved bytes data to {file_path}")
+                logger.debug("Saved bytes data to %s", file_path)
             
             # 处理Gradio的二进制文件上传
             elif isinstance(uploaded_file, tuple) and len(uploaded_file) == 2:
                 # Gradio的二进制文件上传格式为(file_name, file_data)
                 file_name, file_data = uploaded_file
-                temp_dir = tempfile.gettempdir()
-                file_path = os.path.join(temp_dir, os.path.basename(file_name))
+                file_path = _upload_path(upload_dir, file_name)
                 
                 # 保存文件内容
-                with open(file_path, 'wb') as f:
+                with open(file_path, 'wb', buffering=_COPY_BUFSIZE) as f:
                     f.write(file_data)
                     
                 file_paths.append(file_path)
-                logger.info(f"Saved binary file to {file_path}")
+                logger.debug("Saved binary file to %s", file_path)
             
             # 处理常规文件对象
             elif hasattr(uploaded_file, 'name') and hasattr(uploaded_file, 'read'):
                 # 正常的文件对象
-                temp_dir = tempfile.gettempdir()
-                file_name = os.path.basename(uploaded_file.name)
-                file_path = os.path.join(temp_dir, file_name)
+                file_path = _upload_path(upload_dir, uploaded_file.name)
                 
                 # 保存文件内容
-                with open(file_path, 'wb') as f:
-                    f.write(uploaded_file.read())
+                _copy_file_object(uploaded_file, file_path)
                     
                 file_paths.append(file_path)
-                logger.info(f"Saved file object to {file_path}")
+                logger.debug("Saved file object to %s", file_path)
             
             # 处理字典形式的文件
             elif isinstance(uploaded_file, dict):
                 if 'name' in uploaded_file and 'data' in uploaded_file:
                     # Gradio文件对象格式
-                    temp_dir = tempfile.gettempdir()
-                    file_name = os.path.basename(uploaded_file['name'])
-                    file_path = os.path.join(temp_dir, file_name)
+                    file_path = _upload_path(upload_dir, uploaded_file['name'])
                     
                     # 保存文件内容
-                    with open(file_path, 'wb') as f:
+                    with open(file_path, 'wb', buffering=_COPY_BUFSIZE) as f:
                         f.write(uploaded_file['data'])
                         
                     file_paths.append(file_path)
-                    logger.info(f"Saved dict file to {file_path}")
+                    logger.debug("Saved dict file to %s", file_path)
                 else:
-                    logger.warning(f"Dict missing required keys: {uploaded_file.keys()}")
+                    logger.warning("Dict missing required keys: %s", uploaded_file.keys())
             
             # 处理字符串路径
             elif isinstance(uploaded_file, str):
                 if os.path.exists(uploaded_file):
                     file_paths.append(uploaded_file)
-                    logger.info(f"Using existing file path: {uploaded_file}")
+                    logger.debug("Using existing file path: %s", uploaded_file)
                 else:
-                    logger.warning(f"File path does not exist: {uploaded_file}")
+                    logger.warning("File path does not exist: %s", uploaded_file)
             
             # 其他类型
             else:
-                logger.warning(f"Unsupported file object type: {type(uploaded_file)}")
-                if hasattr(uploaded_file, '__dict__'):
-                    logger.warning(f"Object attributes: {uploaded_file.__dict__}")
+                logger.warning("Unsupported file object type: %s", type(uploaded_file))
+                if logger.isEnabledFor(logging.DEBUG) and hasattr(uploaded_file, '__dict__'):
+                    logger.debug("Object attributes: %s", uploaded_file.__dict__)
                 
         except Exception as e:
-            logger.error(f"Error saving uploaded file: {e}", exc_info=True)
+            logger.error("Error saving uploaded file: %s", e, exc_info=True)
+    
+    # 一个文件都没写进去时，目录也不留给调用方清理
+    if upload_dir and not any(p.startswith(upload_dir + os.sep) for p in file_paths):
+        cleanup_uploaded_files([os.path.join(upload_dir, "")])
     
     return file_paths
 